@@ -0,0 +1,114 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_expires_at, token_expiry_from_now
+from .models import CustomUser, TokenExpiry
+
+# Threads hashing passwords in this process: the cap on CPU spent on logins and signups
+HASHING_WORKERS = getattr(settings, 'AUTH_HASHING_WORKERS', 2)
+# Hashes allowed to wait for a thread before new ones are turned away
+HASHING_QUEUE = getattr(settings, 'AUTH_HASHING_QUEUE', 64)
+
+_executor = ThreadPoolExecutor(max_workers=HASHING_WORKERS, thread_name_prefix='password-hasher')
+_slots = threading.BoundedSemaphore(HASHING_WORKERS + HASHING_QUEUE)
+
+
+class HashingBusy(Exception):
+    pass
+
+
+class EmailTaken(Exception):
+    pass
+
+
+async def _hash_in_pool(fn, *args):
+    # PBKDF2 releases the GIL, so the pool's threads hash in parallel with request handling
+    if not _slots.acquire(blocking=False):
+        raise HashingBusy('Too many logins in progress, please retry.')
+    try:
+        return await asyncio.wrap_future(_executor.submit(fn, *args))
+    finally:
+        _slots.release()
+
+
+async def hash_password(raw_password):
+    return await _hash_in_pool(make_password, raw_password)
+
+
+def _check(raw_password, encoded):
+    needs_rehash = []
+    valid = check_password(raw_password, encoded, setter=lambda raw: needs_rehash.append(True))
+    return valid, bool(needs_rehash)
+
+
+async def authenticate_account(email, raw_password):
+    """
+    The active user with these credentials, or None, like ModelBackend.authenticate()
+    but with the hashing done on the bounded pool. Raises HashingBusy when it is full.
+    """
+    user = await CustomUser.objects.filter(email=email).afirst()
+    if user is None:
+        # Hash anyway, so unknown emails take as long as wrong passwords
+        await hash_password(raw_password)
+        return None
+
+    valid, needs_rehash = await _hash_in_pool(_check, raw_password, user.password)
+    if not valid or not user.is_active:
+        return None
+    if needs_rehash:
+        # The hasher or its iteration count changed since this password was set
+        user.password = await hash_password(raw_password)
+        await user.asave(update_fields=['password'])
+    return user
+
+
+@sync_to_async
+def _insert_account(fields, password_hash):
+    with transaction.atomic():
+        user = CustomUser(**fields, password=password_hash)
+        user.email = CustomUser.objects.normalize_email(user.email)
+        try:
+            user.save()
+        except IntegrityError:
+            raise EmailTaken('A user with this email already exists.')
+        return user, Token.objects.create(user=user)
+
+
+async def create_account(validated_data):
+    """
+    ``(user, token)`` for a new account, inserted together in one transaction. The
+    unique email column is the only existence check; a duplicate raises EmailTaken.
+    """
+    fields = dict(validated_data)
+    password_hash = await hash_password(fields.pop('password'))
+    return await _insert_account(fields, password_hash)
+
+
+@sync_to_async
+def issue_token(user):
+    """
+    ``user``'s token for a successful login: the current one with its expiry pushed
+    forward, or a new key if it has expired (an expired key never works again).
+    """
+    token = Token.objects.select_related('expiry').filter(user=user).first()
+    if token is not None:
+        expires_at = token_expires_at(token)
+        if expires_at is not None and expires_at > timezone.now():
+            TokenExpiry.objects.filter(pk=token.key).update(expires_at=token_expiry_from_now())
+            return token
+    try:
+        with transaction.atomic():
+            if token is not None:
+                token.delete()
+            return Token.objects.create(user=user)  # Its TokenExpiry is created by api.signals
+    except IntegrityError:
+        # A concurrent login for the same user rotated it first
+        return Token.objects.get(user=user)
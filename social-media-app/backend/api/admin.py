@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CustomUser, Post, Like, Share, PostImage, Comment
+from .models import CustomUser, Post, Like, Share, PostImage, Comment, MediaUploadJob, MediaAsset, MediaDeletion, TokenExpiry
 
 @admin.register(CustomUser)
 class CustomUserAdmin(admin.ModelAdmin):
@@ -11,7 +11,7 @@ class CustomUserAdmin(admin.ModelAdmin):
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'content', 'created_at', 'like_count', 'share_count', 'comment_count')
+    list_display = ('id', 'user', 'content', 'created_at', 'like_count', 'share_count', 'comment_count', 'media_status')
     search_fields = ('user__email', 'content')
     list_filter = ('created_at',)
     ordering = ('-created_at',)
@@ -35,14 +35,46 @@ class ShareAdmin(admin.ModelAdmin):
 
 @admin.register(PostImage)
 class PostImageAdmin(admin.ModelAdmin):
-    list_display = ('id', 'post', 'image')
+    list_display = ('id', 'post', 'image', 'status')
     search_fields = ('post__id',)
+    list_filter = ('status',)
     ordering = ('id',)
 
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'post', 'content', 'created_at')
+    list_display = ('id', 'user', 'post', 'parent', 'depth', 'reply_count', 'content', 'created_at')
     search_fields = ('user__email', 'post__id', 'content')
+    raw_id_fields = ('parent', 'root')
+    readonly_fields = ('root', 'path', 'depth', 'reply_count')
     list_filter = ('created_at',)
     ordering = ('-created_at',)
+
+
+@admin.register(MediaUploadJob)
+class MediaUploadJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'post_image', 'state', 'attempts', 'created_at', 'updated_at')
+    search_fields = ('post_image__post__id', 'last_error')
+    list_filter = ('state',)
+    ordering = ('-created_at',)
+
+
+@admin.register(MediaAsset)
+class MediaAssetAdmin(admin.ModelAdmin):
+    list_display = ('id', 'public_id', 'width', 'height', 'bytes', 'created_at')
+    search_fields = ('public_id', 'content_hash')
+    ordering = ('-created_at',)
+
+
+@admin.register(MediaDeletion)
+class MediaDeletionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'public_id', 'attempts', 'queued_at')
+    search_fields = ('public_id', 'last_error')
+    ordering = ('queued_at',)
+
+
+@admin.register(TokenExpiry)
+class TokenExpiryAdmin(admin.ModelAdmin):
+    list_display = ('token__user', 'expires_at')
+    raw_id_fields = ('token',)
+    ordering = ('expires_at',)
@@ -0,0 +1,168 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .models import CustomUser, TokenExpiry
+
+CACHE_SIZE = getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 10000)
+CACHE_TTL = getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 60)
+SHARED_CACHE = getattr(settings, 'AUTH_TOKEN_SHARED_CACHE', None)
+SHARED_CACHE_TTL = getattr(settings, 'AUTH_TOKEN_SHARED_CACHE_TTL', 300)
+TOKEN_LIFETIME = getattr(settings, 'AUTH_TOKEN_LIFETIME', 60 * 60 * 24 * 30)
+TOKEN_REFRESH_INTERVAL = getattr(settings, 'AUTH_TOKEN_REFRESH_INTERVAL', 60 * 60)
+# A token used with less than this left has not been refreshed for a full interval
+TOKEN_SLIDE_AFTER = timedelta(seconds=TOKEN_LIFETIME - TOKEN_REFRESH_INTERVAL)
+
+# Everything on CustomUser except the password hash, which is never cached; reading
+# user.password on an authenticated request loads it from the database as a deferred field
+SNAPSHOT_FIELDS = tuple(field.attname for field in CustomUser._meta.concrete_fields if field.attname != 'password')
+
+
+class TokenCache:
+    """
+    Thread-safe LRU of token key -> ``(user snapshot, token created, token expires)`` whose entries
+    expire ``ttl`` seconds after they were stored.
+    """
+
+    def __init__(self, size=CACHE_SIZE, ttl=CACHE_TTL):
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_local = TokenCache()
+
+
+def _shared_cache():
+    return caches[SHARED_CACHE] if SHARED_CACHE else None
+
+
+def _shared_key(key):
+    # Tokens are credentials; the shared cache only ever sees a digest of them
+    return 'authtoken:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def invalidate_token(key):
+    """Drop ``key`` from both tiers, e.g. after the token was deleted or rotated."""
+    _local.delete(key)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.delete(_shared_key(key))
+
+
+def invalidate_user_tokens(user_id):
+    """Drop every cached token of ``user_id``, so the next request reloads the user."""
+    for key in Token.objects.filter(user_id=user_id).values_list('key', flat=True):
+        invalidate_token(key)
+
+
+def token_expiry_from_now():
+    return timezone.now() + timedelta(seconds=TOKEN_LIFETIME)
+
+
+def token_expires_at(token):
+    """When ``token`` expires; None (treated as expired) if it has no TokenExpiry row."""
+    try:
+        return token.expiry.expires_at
+    except TokenExpiry.DoesNotExist:
+        return None
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that skips the Token + user query for recently seen tokens.
+
+    Active users are cached per process (LRU, AUTH_TOKEN_CACHE_TTL seconds) and, when
+    AUTH_TOKEN_SHARED_CACHE names a Django cache alias, in that cache as well. api.signals
+    invalidates a token when it is deleted and a user's tokens when the user is saved,
+    in both tiers. Other processes' in-process entries are not reached and live out
+    their TTL, which bounds how long a change (e.g. deactivation) takes to apply
+    everywhere; QuerySet.update() on users bypasses the signals the same way.
+
+    Tokens expire AUTH_TOKEN_LIFETIME seconds after they were last used. The expiry is
+    cached with the user, so expired tokens are rejected without a query.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = _local.get(key)
+        shared = _shared_cache()
+        if cached is None and shared is not None:
+            cached = shared.get(_shared_key(key))
+            if cached is not None:
+                _local.set(key, cached)
+
+        user = None
+        store = cached is None
+        if store:
+            try:
+                # The expiry row is joined in, so checking it costs no extra query
+                token = Token.objects.select_related('user', 'expiry').get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            user = token.user
+            cached = ({name: getattr(user, name) for name in SNAPSHOT_FIELDS}, token.created, token_expires_at(token))
+
+        snapshot, created, expires_at = cached
+        if not snapshot['is_active']:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        now = timezone.now()
+        if expires_at is None or expires_at <= now:
+            if not store:
+                invalidate_token(key)
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+        if expires_at - now < TOKEN_SLIDE_AFTER:
+            # Sliding expiry, written at most once per AUTH_TOKEN_REFRESH_INTERVAL per token
+            expires_at = token_expiry_from_now()
+            TokenExpiry.objects.filter(pk=key).update(expires_at=expires_at)
+            cached, store = (snapshot, created, expires_at), True
+        if store:
+            self._store(key, cached)
+
+        if user is None:
+            # A fresh instance per request: views may modify and save request.user
+            user = CustomUser.from_db('default', SNAPSHOT_FIELDS, [snapshot[name] for name in SNAPSHOT_FIELDS])
+        return user, Token(key=key, user=user, created=created)
+
+    def _store(self, key, cached):
+        _local.set(key, cached)
+        shared = _shared_cache()
+        if shared is not None:
+            shared.set(_shared_key(key), cached, SHARED_CACHE_TTL)
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .queries import feed_queryset
+from .serializers import PostSerializer
+
+POST_CACHE_TIMEOUT = getattr(settings, 'POST_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def post_cache_key(post_id, version, shape=''):
+    return f'post:{post_id}:v{version}:{shape}'
+
+
+def fieldset_shape(fields=None, expand=()):
+    """Short cache-key component identifying one PostSerializer output shape."""
+    if fields is None and not expand:
+        return ''
+    return f"{'*' if fields is None else ','.join(fields)}+{','.join(expand)}"
+
+
+def serialize_posts(posts, fields=None, expand=(), personalize=None):
+    """
+    Serialized PostSerializer data for ``posts``, in the same order.
+
+    ``posts`` only needs ``id`` and ``version`` loaded. Fragments are looked up with a
+    single get_many(); only the misses are fetched through feed_queryset() and
+    serialized, then written back. A version bump (see api.signals) changes the key,
+    so stale fragments are simply never read again. ``personalize(post_id, data)``,
+    if given, adds per-viewer values on the way out and must return a copy.
+    """
+    shape = fieldset_shape(fields, expand)
+    keys = {post.id: post_cache_key(post.id, post.version, shape) for post in posts}
+    cached = cache.get_many(keys.values())
+
+    missing_ids = [post_id for post_id, key in keys.items() if key not in cached]
+    if missing_ids:
+        fresh = {}
+        for post in feed_queryset(fields=fields, expand=expand).filter(pk__in=missing_ids):
+            data = PostSerializer(post, fields=fields, expand=expand).data
+            # The row may have moved on since the page was read; cache under its own version
+            fresh[post_cache_key(post.id, post.version, shape)] = data
+            cached[keys[post.id]] = data
+        cache.set_many(fresh, POST_CACHE_TIMEOUT)
+
+    # Posts deleted between the page query and here are dropped
+    data = [(post.id, cached[keys[post.id]]) for post in posts if keys[post.id] in cached]
+    if personalize is None:
+        return [fragment for _, fragment in data]
+    return [personalize(post_id, fragment) for post_id, fragment in data]
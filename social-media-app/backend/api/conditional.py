@@ -0,0 +1,50 @@
+import hashlib
+
+from django.http import HttpResponseBase
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def posts_etag(request, posts, *extra):
+    """
+    Strong ETag for a list response built from ``posts``.
+
+    ``posts`` only needs ``id`` and ``version`` loaded: every change that alters a
+    post's serialized form bumps its version (see api.signals), and new or deleted
+    posts change the id list, so the tag moves exactly when the body would. The viewer
+    and the full path (cursor, limit and any other options) are mixed in as well.
+    """
+    digest = hashlib.sha1()
+    digest.update(f'{request.user.pk}|{request.get_full_path()}'.encode())
+    for post in posts:
+        digest.update(f'|{post.id}:{post.version}'.encode())
+    for value in extra:
+        digest.update(f'|{value}'.encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def _etag_matches(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return etag in (tag.strip() for tag in header.split(','))
+
+
+def conditional_response(request, etag, build_body, status_code=status.HTTP_200_OK):
+    """
+    Answer 304 when the client already holds ``etag``; otherwise call ``build_body()``.
+
+    ``build_body()`` returns either response data or a ready-made response (e.g. a
+    streaming one), which is sent as-is with the validator headers added.
+    """
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    if _etag_matches(request, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    body = build_body()
+    if isinstance(body, HttpResponseBase):
+        for name, value in headers.items():
+            body[name] = value
+        return body
+    return Response(body, status=status_code, headers=headers)
@@ -0,0 +1,60 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Like, Post
+
+
+def _table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def like_post(user_id, post_id):
+    """
+    Record that ``user_id`` likes ``post_id``; returns ``(created, like_count)``.
+
+    A single INSERT ... ON CONFLICT DO NOTHING, so repeated or racing calls are
+    harmless. The counter only moves when a row was actually inserted, in the same
+    transaction, and the new value comes back from that UPDATE. Raises
+    Post.DoesNotExist for an unknown post.
+    """
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {_table(Like)} (user_id, post_id, created_at) '
+            f'SELECT %s, %s, %s WHERE EXISTS (SELECT 1 FROM {_table(Post)} WHERE id = %s) '
+            f'ON CONFLICT (user_id, post_id) DO NOTHING',
+            [user_id, post_id, now, post_id],
+        )
+        created = cursor.rowcount == 1
+        return created, _adjust_like_count(cursor, post_id, 1 if created else 0)
+
+
+def unlike_post(user_id, post_id):
+    """Remove ``user_id``'s like of ``post_id`` if there is one; returns ``(deleted, like_count)``."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {_table(Like)} WHERE user_id = %s AND post_id = %s', [user_id, post_id])
+        deleted = cursor.rowcount == 1
+        return deleted, _adjust_like_count(cursor, post_id, -1 if deleted else 0)
+
+
+def _adjust_like_count(cursor, post_id, delta):
+    """
+    Apply ``delta`` to the post's like_count (bumping its version, as api.signals
+    does) and return the new count.
+    """
+    post_table = _table(Post)
+    if delta:
+        guard = ' AND like_count > 0' if delta < 0 else ''
+        sql = f'UPDATE {post_table} SET like_count = like_count + %s, version = version + 1 WHERE id = %s{guard}'
+        if connection.features.can_return_columns_from_insert:  # SQLite 3.35+ and PostgreSQL
+            cursor.execute(sql + ' RETURNING like_count', [delta, post_id])
+            row = cursor.fetchone()
+            if row is not None:
+                return row[0]
+        else:
+            cursor.execute(sql, [delta, post_id])
+    cursor.execute(f'SELECT like_count FROM {post_table} WHERE id = %s', [post_id])
+    row = cursor.fetchone()
+    if row is None:
+        raise Post.DoesNotExist('Post not found.')
+    return row[0]
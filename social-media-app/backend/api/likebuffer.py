@@ -0,0 +1,254 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .engagement import _table, like_post, unlike_post
+from .models import CustomUser, Like, Post
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = getattr(settings, 'LIKES_FLUSH_INTERVAL_MS', 200) / 1000
+# (user_id, post_id) pairs per INSERT / DELETE statement during a flush
+FLUSH_CHUNK_SIZE = 500
+
+
+class LikeBuffer:
+    """
+    In-process write-behind buffer for like / unlike intents.
+
+    Intents are coalesced per (user, post): only the last one counts, and a like
+    followed by an unlike before the next flush never reaches the database. A daemon
+    thread writes the net changes every LIKES_FLUSH_INTERVAL_MS in one transaction,
+    with one counter UPDATE per touched post. Until then, pending_deltas() lets reads
+    add the buffered changes to the stored like_count.
+    """
+
+    def __init__(self, interval=FLUSH_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # (user_id, post_id) -> [liked in the database before, liked now]
+        self._pending, self._flushing = {}, {}
+        # post_id -> net like_count change held in _pending / _flushing
+        self._pending_deltas, self._flushing_deltas = Counter(), Counter()
+        self._thread = None
+
+    # -- intents ----------------------------------------------------------------
+
+    def is_liked(self, user_id, post_id):
+        with self._lock:
+            state = self._buffered_state((user_id, post_id))
+        if state is None:
+            state = Like.objects.filter(user_id=user_id, post_id=post_id).exists()
+        return state
+
+    def set(self, user_id, post_id, liked):
+        """
+        Buffer ``user_id``'s like state for ``post_id``; returns ``(changed, like_count)``
+        with the pending changes included. Raises Post.DoesNotExist for an unknown post.
+        """
+        like_count = Post.objects.values_list('like_count', flat=True).get(pk=post_id)
+        key = (user_id, post_id)
+        with self._lock:
+            known = self._buffered_state(key) is not None
+        stored = None if known else Like.objects.filter(user_id=user_id, post_id=post_id).exists()
+
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                base = self._buffered_state(key)  # The in-flight state, if a flush holds this pair
+                base = stored if base is None else base
+                entry = self._pending[key] = [base, base]
+            changed = entry[1] != liked
+            self._pending_deltas[post_id] += int(liked) - int(entry[1])
+            entry[1] = liked
+            like_count += self._pending_deltas[post_id] + self._flushing_deltas[post_id]
+        self._ensure_flusher()
+        return changed, max(like_count, 0)
+
+    def pending_deltas(self, post_ids):
+        """{post_id: like_count change not yet in the database} for ``post_ids``."""
+        with self._lock:
+            deltas = {
+                post_id: self._pending_deltas[post_id] + self._flushing_deltas[post_id]
+                for post_id in post_ids
+                if post_id in self._pending_deltas or post_id in self._flushing_deltas
+            }
+        return {post_id: delta for post_id, delta in deltas.items() if delta}
+
+    def buffered_states(self, user_id, post_ids):
+        """{post_id: liked} for ``user_id``'s intents on ``post_ids`` that are not written yet."""
+        with self._lock:
+            states = {post_id: self._buffered_state((user_id, post_id)) for post_id in post_ids}
+        return {post_id: liked for post_id, liked in states.items() if liked is not None}
+
+    def _buffered_state(self, key):
+        for intents in (self._pending, self._flushing):
+            if key in intents:
+                return intents[key][1]
+        return None
+
+    # -- flushing ---------------------------------------------------------------
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of (user, post) pairs written."""
+        with self._flush_lock:
+            with self._lock:
+                self._flushing, self._pending = self._pending, {}
+                self._flushing_deltas, self._pending_deltas = self._pending_deltas, Counter()
+            states = {key: liked for key, (before, liked) in self._flushing.items() if before != liked}
+            try:
+                if states:
+                    write_like_states(states)
+            except Exception:
+                logger.exception('Flushing %s buffered like(s) failed; will retry', len(states))
+                with self._lock:
+                    self._requeue_flushing()
+                return 0
+            finally:
+                with self._lock:
+                    self._flushing, self._flushing_deltas = {}, Counter()
+            return len(states)
+
+    def _requeue_flushing(self):
+        # Put the failed batch back underneath any intents that arrived meanwhile
+        for key, (before, liked) in self._flushing.items():
+            entry = self._pending.setdefault(key, [liked, liked])
+            entry[0] = before
+            self._pending_deltas[key[1]] += int(liked) - int(before)
+
+    def _ensure_flusher(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='like-buffer-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            close_old_connections()
+            self.flush()
+
+
+def write_like_states(states):
+    """
+    Apply ``{(user_id, post_id): liked}`` in one transaction and move each touched
+    post's like_count by the rows actually inserted or deleted; returns {post_id: delta}.
+
+    Inserts are ON CONFLICT DO NOTHING and both statements RETURN the rows they
+    changed, so the counters stay exact even when several processes flush the same
+    pairs. Pairs whose post or user has been deleted are skipped.
+    """
+    if not connection.features.can_return_columns_from_insert:
+        return _write_like_states_one_by_one(states)  # No RETURNING on this backend
+
+    likes = [key for key, liked in states.items() if liked]
+    unlikes = [key for key, liked in states.items() if not liked]
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    deltas = Counter()
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            for start in range(0, len(unlikes), FLUSH_CHUNK_SIZE):
+                chunk = unlikes[start:start + FLUSH_CHUNK_SIZE]
+                cursor.execute(
+                    f'DELETE FROM {_table(Like)} WHERE (user_id, post_id) IN (VALUES {_pairs_sql(chunk)}) '
+                    f'RETURNING post_id',
+                    [value for pair in chunk for value in pair],
+                )
+                deltas.subtract(post_id for (post_id,) in cursor.fetchall())
+            for start in range(0, len(likes), FLUSH_CHUNK_SIZE):
+                chunk = likes[start:start + FLUSH_CHUNK_SIZE]
+                cursor.execute(
+                    f'INSERT INTO {_table(Like)} (user_id, post_id, created_at) '
+                    f'SELECT v.column1, v.column2, %s FROM (VALUES {_pairs_sql(chunk)}) AS v '
+                    f'WHERE EXISTS (SELECT 1 FROM {_table(Post)} WHERE id = v.column2) '
+                    f'AND EXISTS (SELECT 1 FROM {_table(CustomUser)} WHERE id = v.column1) '
+                    f'ON CONFLICT (user_id, post_id) DO NOTHING RETURNING post_id',
+                    [now] + [value for pair in chunk for value in pair],
+                )
+                deltas.update(post_id for (post_id,) in cursor.fetchall())
+            for post_id, delta in deltas.items():
+                if delta:
+                    Post.objects.filter(pk=post_id).update(
+                        like_count=F('like_count') + delta, version=F('version') + 1
+                    )
+    except IntegrityError:
+        # A post or user vanished between the EXISTS check and commit; write pair by pair
+        logger.warning('Like batch hit a deleted post or user; retrying row by row')
+        return _write_like_states_one_by_one(states)
+    return deltas
+
+
+def _write_like_states_one_by_one(states):
+    """Slow path: the single-row statements from api.engagement, which report their own changes."""
+    deltas = Counter()
+    for (user_id, post_id), liked in states.items():
+        try:
+            changed, _ = (like_post if liked else unlike_post)(user_id, post_id)
+        except (Post.DoesNotExist, IntegrityError):
+            continue
+        if changed:
+            deltas[post_id] += 1 if liked else -1
+    return deltas
+
+
+def _pairs_sql(pairs):
+    return ', '.join(['(%s, %s)'] * len(pairs))
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_like_buffer():
+    """The process-wide LikeBuffer when LIKES_WRITE_BEHIND is on, else None."""
+    global _buffer
+    if not getattr(settings, 'LIKES_WRITE_BEHIND', False):
+        return None
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = LikeBuffer()
+                atexit.register(_buffer.flush)  # Don't lose the last interval on a clean shutdown
+    return _buffer
+
+
+def set_like(user_id, post_id, liked):
+    """Like or unlike, through the buffer when write-behind is on; returns ``(changed, like_count)``."""
+    buffer = get_like_buffer()
+    if buffer is not None:
+        return buffer.set(user_id, post_id, liked)
+    return (like_post if liked else unlike_post)(user_id, post_id)
+
+
+def toggle_like(user_id, post_id):
+    """Flip ``user_id``'s like of ``post_id``; returns ``(liked, like_count)``."""
+    buffer = get_like_buffer()
+    if buffer is not None:
+        liked = not buffer.is_liked(user_id, post_id)
+        return liked, buffer.set(user_id, post_id, liked)[1]
+    removed, like_count = unlike_post(user_id, post_id)
+    if removed:
+        return False, like_count
+    return True, like_post(user_id, post_id)[1]
+
+
+def pending_like_deltas(post_ids):
+    """Buffered like_count changes for ``post_ids``; always empty without write-behind."""
+    buffer = get_like_buffer()
+    return buffer.pending_deltas(post_ids) if buffer is not None else {}
+
+
+def buffered_like_states(user_id, post_ids):
+    """{post_id: liked} for the viewer's likes still in the buffer; empty without write-behind."""
+    buffer = get_like_buffer()
+    return buffer.buffered_states(user_id, post_ids) if buffer is not None else {}
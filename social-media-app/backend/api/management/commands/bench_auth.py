@@ -0,0 +1,79 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.authentication import CachedTokenAuthentication, _local
+from api.models import CustomUser
+
+AUTHENTICATORS = (
+    ('token', TokenAuthentication),
+    ('cached', CachedTokenAuthentication),
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare queries and time per request of TokenAuthentication and CachedTokenAuthentication."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Authenticated requests per class.')
+        parser.add_argument('--users', type=int, default=50, help='Distinct users / tokens to rotate through.')
+
+    def handle(self, *args, **options):
+        # The benchmark users only exist inside this transaction
+        try:
+            with transaction.atomic():
+                keys = self._make_tokens(options['users'])
+                self.stdout.write(f"{'class':<8} {'queries/request':>16} {'us/request':>11}")
+                results = {}
+                for name, cls in AUTHENTICATORS:
+                    results[name] = self._measure(cls, keys, options['requests'])
+                    self.stdout.write(f"{name:<8} {results[name][0]:>16.3f} {results[name][1]:>11.1f}")
+                raise _Rollback
+        except _Rollback:
+            pass
+        finally:
+            _local.clear()
+
+        saved = results['token'][0] - results['cached'][0]
+        self.stdout.write(
+            f"Saved {saved:.3f} queries per request ({saved * 1000:.0f} per 1000 requests, "
+            f"{len(keys)} users, the first request of each one misses the cache)."
+        )
+
+    def _make_tokens(self, count):
+        prefix = uuid.uuid4().hex[:8]
+        users = CustomUser.objects.bulk_create(
+            CustomUser(email=f'bench-{prefix}-{i}@example.com', first_name='Bench') for i in range(count)
+        )
+        return [Token.objects.create(user=user).key for user in users]
+
+    def _measure(self, cls, keys, count):
+        factory = APIRequestFactory()
+        requests = [
+            factory.get('/api/posts/', HTTP_AUTHORIZATION=f'Token {keys[i % len(keys)]}') for i in range(count)
+        ]
+
+        def run():
+            _local.clear()  # Every run starts cold
+            for request in requests:
+                if not Request(request, authenticators=[cls()]).user.is_authenticated:
+                    raise RuntimeError('Benchmark request was not authenticated.')
+
+        with CaptureQueriesContext(connection) as queries:
+            run()
+        # Timed separately: capturing queries slows every database call down
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        return len(queries) / count, elapsed * 1e6 / count
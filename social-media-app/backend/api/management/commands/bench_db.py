@@ -0,0 +1,144 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection
+
+from api.engagement import like_post, unlike_post
+from api.models import CustomUser, Post
+from api.queries import feed_queryset
+
+FEED_FIELDS = ['user', 'content', 'like_count', 'comment_count', 'share_count', 'created_at']
+
+
+def _percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare like-write and feed-read throughput of the DB_PROFILE database profiles under concurrency. "
+        "Each profile runs in its own process against a scratch test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', default='sqlite,sqlite-wal',
+                            help=f"Comma-separated, from: {', '.join(settings.DATABASE_PROFILES)}.")
+        parser.add_argument('--writers', type=int, default=4, help='Threads liking / unliking posts.')
+        parser.add_argument('--readers', type=int, default=4, help='Threads reading feed pages.')
+        parser.add_argument('--seconds', type=float, default=5, help='Duration of each run.')
+        parser.add_argument('--posts', type=int, default=200, help='Posts in the scratch database.')
+        parser.add_argument('--profile', help='Run a single profile in this process (set DB_PROFILE to match).')
+
+    def handle(self, *args, **options):
+        if options['profile']:
+            self.stdout.write(json.dumps(self._measure(options)))
+            return
+
+        self.stdout.write(
+            f"{'profile':<14} {'writes/s':>9} {'reads/s':>9} {'write p95 ms':>13} {'read p95 ms':>12} {'lock errors':>12}"
+        )
+        for profile in options['profiles'].split(','):
+            if profile not in settings.DATABASE_PROFILES:
+                raise CommandError(f'Unknown profile {profile!r}.')
+            # Each profile needs its own settings, hence its own process
+            out = subprocess.run(
+                [sys.executable, sys.argv[0], 'bench_db', '--profile', profile,
+                 '--writers', str(options['writers']), '--readers', str(options['readers']),
+                 '--seconds', str(options['seconds']), '--posts', str(options['posts'])],
+                capture_output=True, text=True, env={**os.environ, 'DB_PROFILE': profile},
+            )
+            if out.returncode:
+                self.stderr.write(f'{profile}: failed\n{out.stderr.strip().splitlines()[-1]}')
+                continue
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+            self.stdout.write(
+                f"{profile:<14} {result['writes_per_s']:>9.0f} {result['reads_per_s']:>9.0f} "
+                f"{result['write_p95_ms']:>13.1f} {result['read_p95_ms']:>12.1f} {result['lock_errors']:>12}"
+            )
+
+    def _measure(self, options):
+        if options['profile'] != settings.DB_PROFILE:
+            raise CommandError(f"Run with DB_PROFILE={options['profile']}.")
+        with tempfile.TemporaryDirectory() as scratch:
+            if connection.vendor == 'sqlite':
+                # A file, not the in-memory default, so every thread sees the same database
+                connection.settings_dict['TEST']['NAME'] = os.path.join(scratch, 'bench.sqlite3')
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                user_ids, post_ids = self._seed(options['posts'])
+                close_old_connections()
+                return self._run(options, user_ids, post_ids)
+            finally:
+                connection.close()
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def _seed(self, post_count):
+        users = CustomUser.objects.bulk_create(
+            CustomUser(email=f'bench{i}@example.com', first_name='Bench') for i in range(50)
+        )
+        posts = Post.objects.bulk_create(
+            Post(user=users[i % len(users)], content=f'Post {i}. ' * 10) for i in range(post_count)
+        )
+        return [user.pk for user in users], [post.pk for post in posts]
+
+    def _run(self, options, user_ids, post_ids):
+        deadline = None
+        start = threading.Barrier(options['writers'] + options['readers'] + 1)
+        lock = threading.Lock()
+        latencies = {'write': [], 'read': []}
+        errors = [0]
+
+        def write():
+            rng = random.Random()
+            user_id, post_id = rng.choice(user_ids), rng.choice(post_ids)
+            (like_post if rng.random() < 0.6 else unlike_post)(user_id, post_id)
+
+        def read():
+            list(feed_queryset(fields=FEED_FIELDS).order_by('-created_at', '-id')[:20])
+
+        def worker(kind, operation):
+            samples, failed = [], 0
+            start.wait()
+            while time.perf_counter() < deadline:
+                began = time.perf_counter()
+                try:
+                    operation()
+                    samples.append(time.perf_counter() - began)
+                except OperationalError:  # "database is locked"
+                    failed += 1
+                # End of a "request": closes the connection unless the profile keeps it
+                close_old_connections()
+            connection.close()
+            with lock:
+                latencies[kind].extend(samples)
+                errors[0] += failed
+
+        threads = [threading.Thread(target=worker, args=('write', write)) for _ in range(options['writers'])]
+        threads += [threading.Thread(target=worker, args=('read', read)) for _ in range(options['readers'])]
+        for thread in threads:
+            thread.start()
+        deadline = time.perf_counter() + options['seconds']
+        start.wait()
+        for thread in threads:
+            thread.join()
+
+        seconds = options['seconds']
+        return {
+            'profile': options['profile'],
+            'writes_per_s': len(latencies['write']) / seconds,
+            'reads_per_s': len(latencies['read']) / seconds,
+            'write_p95_ms': _percentile(latencies['write'], 0.95) * 1000,
+            'read_p95_ms': _percentile(latencies['read'], 0.95) * 1000,
+            'lock_errors': errors[0],
+        }
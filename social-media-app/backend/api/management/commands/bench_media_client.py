@@ -0,0 +1,83 @@
+import io
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from api.media.client import CloudinaryClient
+from api.media.standin import StandInServer
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the pooled Cloudinary client against the local stand-in, with "
+        "keep-alive connection reuse on and off."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--uploads', type=int, default=200, help='Uploads per run.')
+        parser.add_argument('--concurrency', type=int, default=8, help='Uploading threads.')
+        parser.add_argument('--size', type=int, default=64 * 1024, help='Bytes per upload.')
+        parser.add_argument('--latency', type=float, default=0.0, help='Stand-in latency per call (seconds).')
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of calls the stand-in fails.')
+
+    def handle(self, *args, **options):
+        payload = os.urandom(options['size'])
+        with tempfile.TemporaryDirectory() as root:
+            server = StandInServer(
+                ('127.0.0.1', 0), root, latency=options['latency'], failure_rate=options['failure_rate']
+            )
+            server.start_in_thread()
+            try:
+                self.stdout.write(
+                    f"{options['uploads']} uploads of {options['size']} bytes, "
+                    f"{options['concurrency']} threads, stand-in at {server.base_url}"
+                )
+                for label, keep_alive in (('keep-alive pool', True), ('new connection per call', False)):
+                    self._run(label, server, keep_alive, payload, options)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    def _run(self, label, server, keep_alive, payload, options):
+        client = CloudinaryClient(
+            base_url=server.base_url, pool_maxsize=options['concurrency'], keep_alive=keep_alive,
+            backoff_base=0.01, backoff_cap=0.1,
+        )
+        latencies, failures = [], 0
+        connections_before = server.connections_accepted
+
+        def upload(i):
+            file = io.BytesIO(payload)
+            file.name = f'bench_{i}.bin'
+            started = time.perf_counter()
+            client.upload(file, folder='bench')
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            futures = [executor.submit(upload, i) for i in range(options['uploads'])]
+            for future in futures:
+                try:
+                    latencies.append(future.result())
+                except Exception:
+                    failures += 1
+        elapsed = time.perf_counter() - started
+        metrics = client.metrics.snapshot()
+
+        self.stdout.write(
+            f"{label:<24} {len(latencies) / elapsed:8.1f} uploads/s  "
+            f"p50 {statistics.median(latencies) * 1000 if latencies else 0:7.1f} ms  "
+            f"p95 {_percentile(latencies, 0.95) * 1000:7.1f} ms  "
+            f"connections {server.connections_accepted - connections_before:4d}  "
+            f"retries {metrics['retries']:3d}  failed {failures}"
+        )
+        client.pool.clear()
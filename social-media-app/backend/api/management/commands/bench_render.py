@@ -0,0 +1,106 @@
+import json
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer, iter_json_list, orjson
+
+MODES = ('stdlib', 'fast', 'stream')
+CHUNK_SIZE = 100
+
+
+def _fake_user(i):
+    return {
+        'id': i, 'email': f'user{i}@example.com', 'first_name': 'First', 'last_name': f'Last{i}',
+        'bio': 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 2,
+        'image': f'https://res.cloudinary.com/demo/image/upload/v1/user_profile_image/u{i}.jpg',
+        'date_of_birth': '1990-01-01', 'gender': 'other',
+    }
+
+
+def _fake_post(i, now):
+    """One post shaped like PostSerializer output."""
+    return {
+        'id': i, 'user': _fake_user(i % 50), 'content': f'Post number {i}. ' * 8,
+        'images': [
+            {'id': i * 3 + n, 'image': f'https://res.cloudinary.com/demo/image/upload/v1/post_images/p{i}_{n}.jpg'}
+            for n in range(3)
+        ],
+        'tagged_users': [_fake_user((i + n) % 50) for n in range(2)],
+        'like_count': i % 97, 'comment_count': i % 13, 'share_count': i % 7,
+        'created_at': (now - timedelta(minutes=i)).isoformat(),
+    }
+
+
+def _chunks(count):
+    """Build the payload lazily, a chunk at a time, the way the streaming view does."""
+    now = datetime.now(timezone.utc)
+    for start in range(0, count, CHUNK_SIZE):
+        yield [_fake_post(i, now) for i in range(start, min(start + CHUNK_SIZE, count))]
+
+
+def _run(mode, count):
+    if mode == 'stream':
+        return sum(len(part) for part in iter_json_list('posts', _chunks(count), {'next': None}))
+    payload = {'posts': [post for chunk in _chunks(count) for post in chunk], 'next': None}
+    renderer = JSONRenderer() if mode == 'stdlib' else FastJSONRenderer()
+    return len(renderer.render(payload))
+
+
+class Command(BaseCommand):
+    help = "Compare CPU time and peak memory of the JSON renderers on a synthetic feed page."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000, help='Posts in the payload.')
+        parser.add_argument('--repeat', type=int, default=20, help='Renders timed per mode.')
+        parser.add_argument('--mode', choices=MODES, help='Run a single mode in this process.')
+
+    def handle(self, *args, **options):
+        if options['mode']:
+            self.stdout.write(json.dumps(self._measure(options['mode'], options['posts'], options['repeat'])))
+            return
+
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; "fast" falls back to stdlib json.'))
+        self.stdout.write(f"{'mode':<8} {'bytes':>10} {'cpu ms/render':>14} {'peak traced KiB':>16} {'RSS growth KiB':>15}")
+        # Each mode runs in its own process so ru_maxrss reflects only that mode
+        for mode in MODES:
+            out = subprocess.run(
+                [sys.executable, sys.argv[0], 'bench_render', '--mode', mode,
+                 '--posts', str(options['posts']), '--repeat', str(options['repeat'])],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            self.stdout.write(
+                f"{mode:<8} {result['bytes']:>10} {result['cpu_ms']:>14.2f} "
+                f"{result['peak_traced_kib']:>16.0f} {result['rss_growth_kib']:>15.0f}"
+            )
+
+    def _measure(self, mode, count, repeat):
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        size = _run(mode, count)  # Warm up and record the body size
+
+        started = time.process_time()
+        for _ in range(repeat):
+            _run(mode, count)
+        cpu_ms = (time.process_time() - started) * 1000 / repeat
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        tracemalloc.start()
+        _run(mode, count)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            'mode': mode,
+            'bytes': size,
+            'cpu_ms': cpu_ms,
+            'peak_traced_kib': peak / 1024,
+            'rss_growth_kib': rss_after - rss_before,  # ru_maxrss is in KiB on Linux
+        }
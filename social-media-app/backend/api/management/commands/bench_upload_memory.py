@@ -0,0 +1,50 @@
+import os
+import tempfile
+import time
+import tracemalloc
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+
+from api.media.client import CloudinaryClient
+from api.media.standin import StandInServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Upload files of growing size through the pooled client to the local stand-in "
+        "and report the peak Python memory of each upload, which should stay flat."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1,8,32,64', help='Comma-separated file sizes in MB.')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        with tempfile.TemporaryDirectory() as root:
+            server = StandInServer(('127.0.0.1', 0), os.path.join(root, 'standin'))
+            server.start_in_thread()
+            client = CloudinaryClient(base_url=server.base_url)
+            try:
+                for size_mb in sizes:
+                    path = os.path.join(root, f'upload_{size_mb}mb.bin')
+                    with open(path, 'wb') as f:
+                        for _ in range(size_mb):
+                            f.write(os.urandom(1024 * 1024))
+
+                    with open(path, 'rb') as f:
+                        tracemalloc.start()
+                        started = time.perf_counter()
+                        result = client.upload(File(f, name=os.path.basename(path)), folder='bench')
+                        elapsed = time.perf_counter() - started
+                        _, peak = tracemalloc.get_traced_memory()
+                        tracemalloc.stop()
+                    os.remove(path)
+
+                    self.stdout.write(
+                        f"{size_mb:5d} MB  uploaded {result['bytes']:>11,d} bytes in {elapsed:6.2f}s  "
+                        f"peak memory {peak / 1024 / 1024:6.2f} MB (client and stand-in)"
+                    )
+            finally:
+                server.shutdown()
+                server.server_close()
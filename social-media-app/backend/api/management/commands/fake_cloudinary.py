@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.media.standin import StandInServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the Cloudinary upload/destroy/delete APIs. "
+        "Point MEDIA_API_BASE_URL at it to use or load-test the media path offline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8900)
+        parser.add_argument('--root', default=str(settings.BASE_DIR / 'fake_media' / 'standin'),
+                            help='Directory the uploaded files are stored in.')
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every API call.')
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of API calls answered with 503.')
+        parser.add_argument('--verbose', action='store_true', help='Log every request.')
+
+    def handle(self, *args, **options):
+        server = StandInServer(
+            (options['host'], options['port']), options['root'],
+            latency=options['latency'], failure_rate=options['failure_rate'], verbose=options['verbose'],
+        )
+        self.stdout.write(f'Cloudinary stand-in listening on {server.base_url} (files in {server.root})')
+        self.stdout.write(f'Set MEDIA_API_BASE_URL={server.base_url} to use it.')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from api.media.gc import MAX_BATCH_SIZE, flush_deletions
+
+
+class Command(BaseCommand):
+    help = "Delete queued media assets from the backend in bulk. Run periodically (e.g. from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=MAX_BATCH_SIZE,
+                            help=f'Assets per bulk delete call (max {MAX_BATCH_SIZE}).')
+        parser.add_argument('--max-batches', type=int, default=0, help='Stop after this many batches (0 = drain).')
+        parser.add_argument('--max-attempts', type=int, default=5, help='Give up on an asset after this many failures.')
+
+    def handle(self, *args, **options):
+        totals = [0, 0, 0]
+        batches = 0
+        while not options['max_batches'] or batches < options['max_batches']:
+            counts = flush_deletions(options['batch_size'], options['max_attempts'])
+            if not any(counts):
+                break
+            batches += 1
+            totals = [total + count for total, count in zip(totals, counts)]
+            if counts[0] == 0 and counts[1] == 0:
+                break  # Only failures left; retry on the next run
+
+        deleted, skipped, failed = totals
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} asset(s) in {batches} batch(es); '
+            f'{skipped} still in use, {failed} failed.'
+        ))
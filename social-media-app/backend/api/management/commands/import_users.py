@@ -0,0 +1,158 @@
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from api.authentication import token_expiry_from_now
+from api.models import CustomUser, TokenExpiry
+
+# Columns read from each row besides email / password; anything else is ignored
+PROFILE_COLUMNS = ('first_name', 'last_name', 'bio', 'image', 'gender')
+
+
+def _read_rows(stream, fmt):
+    """Yield ``(line number, row dict)`` from a CSV or NDJSON stream."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for number, line in enumerate(stream, 1):
+        if line.strip():
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, None
+
+
+def _user_fields(row):
+    """CustomUser field values for one input row; raises ValueError when it cannot be imported."""
+    if not isinstance(row, dict):
+        raise ValueError('not a JSON object')
+    email = CustomUser.objects.normalize_email(str(row.get('email') or '').strip())
+    if '@' not in email:
+        raise ValueError('missing or invalid email')
+    fields = {'email': email}
+    for column in PROFILE_COLUMNS:
+        fields[column] = row.get(column) or ''
+    birthday = row.get('date_of_birth')
+    fields['date_of_birth'] = date.fromisoformat(birthday) if birthday else None
+    return fields
+
+
+class Command(BaseCommand):
+    help = (
+        "Create accounts (and their API tokens) from a CSV or NDJSON file of users. "
+        "Emails that already exist are skipped before hashing, so an interrupted import is resumed by rerunning it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV (with a header row) or NDJSON file; '-' reads NDJSON from stdin.")
+        parser.add_argument('--format', choices=('csv', 'ndjson'), help='Defaults to the file extension.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users inserted per transaction.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Password hashing processes.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+        batch_size = options['batch_size']
+        self.totals = {'rows': 0, 'imported': 0, 'skipped': 0, 'invalid': 0}
+        self.seen = set()  # Emails already taken by earlier rows of this file
+        self.started = time.perf_counter()
+
+        try:
+            stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(str(e))
+        # Spawned, not forked: forked children would share this process's database connection.
+        # Each worker is a fresh interpreter, so it sets Django up before its first make_password()
+        pool = ProcessPoolExecutor(
+            max_workers=options['workers'], mp_context=multiprocessing.get_context('spawn'), initializer=django.setup
+        )
+        try:
+            rows = _read_rows(stream, fmt)
+            pending = None
+            while batch := list(islice(rows, batch_size)):
+                users, passwords = self._prepare(batch)
+                # map() submits the whole batch at once, so it is hashed while the previous batch is inserted
+                hashes = pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (options['workers'] * 4)))
+                if pending:
+                    self._insert(*pending)
+                pending = (users, hashes)
+            if pending:
+                self._insert(*pending)
+        finally:
+            pool.shutdown(cancel_futures=True)
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {self.totals['imported']} users in {elapsed:.1f}s "
+            f"({self.totals['imported'] / elapsed if elapsed else 0:.0f} users/s); "
+            f"skipped {self.totals['skipped']} existing, {self.totals['invalid']} invalid rows."
+        ))
+
+    def _prepare(self, batch):
+        """Valid rows of ``batch`` whose email is not taken yet, as unsaved users plus their passwords."""
+        candidates = []
+        for number, row in batch:
+            self.totals['rows'] += 1
+            try:
+                fields = _user_fields(row)
+            except (TypeError, ValueError) as e:
+                self.totals['invalid'] += 1
+                self.stderr.write(f'Line {number}: {e}')
+                continue
+            password = row.get('password')
+            candidates.append((fields, str(password) if password else None))
+
+        existing = set(
+            CustomUser.objects.filter(email__in=[fields['email'] for fields, _ in candidates])
+            .values_list('email', flat=True)
+        )
+        users, passwords = [], []
+        for fields, password in candidates:
+            if fields['email'] in existing or fields['email'] in self.seen:
+                self.totals['skipped'] += 1
+                continue
+            self.seen.add(fields['email'])
+            users.append(CustomUser(**fields))
+            passwords.append(password)  # None gives an unusable password, as in create_user()
+        return users, passwords
+
+    def _insert(self, users, hashes):
+        for user, password in zip(users, hashes):
+            user.password = password
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(users)
+            if users and users[0].pk is None:
+                # Backends that cannot return ids from a bulk INSERT
+                ids = dict(
+                    CustomUser.objects.filter(email__in=[user.email for user in users]).values_list('email', 'pk')
+                )
+                for user in users:
+                    user.pk = ids[user.email]
+            # bulk_create() skips Token.save(), which is where keys are normally generated, and
+            # the post_save signal that adds each token's expiry
+            tokens = Token.objects.bulk_create(Token(key=Token.generate_key(), user=user) for user in users)
+            expires_at = token_expiry_from_now()
+            TokenExpiry.objects.bulk_create(TokenExpiry(token=token, expires_at=expires_at) for token in tokens)
+
+        self.totals['imported'] += len(users)
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(
+            f"{self.totals['rows']} rows read, {self.totals['imported']} imported "
+            f"({self.totals['imported'] / elapsed:.0f} users/s)"
+        )
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+
+from api.models import Comment, Like, Post, Share
+from api.queries import count_for_post
+
+
+class Command(BaseCommand):
+    help = "Recompute Post.like_count / share_count / comment_count from the engagement tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Posts checked per UPDATE.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        actual = {
+            'actual_likes': count_for_post(Like),
+            'actual_shares': count_for_post(Share),
+            'actual_comments': count_for_post(Comment),
+        }
+        last_id = 0
+        checked = repaired = 0
+
+        while True:
+            ids = list(
+                Post.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            checked += len(ids)
+
+            with transaction.atomic():
+                drifted = (
+                    Post.objects.filter(id__in=ids)
+                    .annotate(**actual)
+                    .filter(
+                        ~Q(like_count=F('actual_likes'))
+                        | ~Q(share_count=F('actual_shares'))
+                        | ~Q(comment_count=F('actual_comments'))
+                    )
+                    .values_list('id', flat=True)
+                )
+                repaired += Post.objects.filter(id__in=list(drifted)).update(
+                    like_count=count_for_post(Like),
+                    share_count=count_for_post(Share),
+                    comment_count=count_for_post(Comment),
+                    # Invalidates the cached fragments and feed ETags that still hold the old counts
+                    version=F('version') + 1,
+                )
+
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} posts, repaired {repaired}.'))
@@ -0,0 +1,72 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api.media.jobs import claim_next_job, process_job, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = "Process queued post image uploads with a pool of worker threads."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent uploads.')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--stale-after', type=int, default=300,
+                            help='Requeue jobs that have been running longer than this many seconds.')
+        parser.add_argument('--requeue-every', type=float, default=60,
+                            help='Seconds between checks for stale jobs while the worker runs.')
+        parser.add_argument('--once', action='store_true', help='Drain the queue and exit.')
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(seconds=options['stale_after'])
+        self._requeue(stale_after)
+
+        stop = threading.Event()
+        counts = {'done': 0, 'failed': 0}
+        lock = threading.Lock()
+
+        def work():
+            try:
+                while not stop.is_set():
+                    job = claim_next_job()
+                    if job is None:
+                        if options['once']:
+                            return
+                        time.sleep(options['poll'])
+                        continue
+                    try:
+                        ok = process_job(job)
+                    except Exception as e:
+                        # Left running; the periodic requeue puts it back on the queue
+                        self.stderr.write(f'Upload job {job.pk}: {e}')
+                        ok = False
+                    with lock:
+                        counts['done' if ok else 'failed'] += 1
+            finally:
+                connections.close_all()  # Each thread holds its own DB connection
+
+        self.stdout.write(f"Media worker started with {options['workers']} thread(s).")
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            futures = [pool.submit(work) for _ in range(options['workers'])]
+            try:
+                # Jobs also get stuck running without a crash, e.g. when recording a finished upload fails
+                while wait(futures, timeout=options['requeue_every']).not_done:
+                    self._requeue(stale_after)
+                    connections.close_all()
+                for future in futures:
+                    future.result()
+            except KeyboardInterrupt:
+                stop.set()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Uploaded {counts['done']} image(s), {counts['failed']} attempt(s) failed."
+        ))
+
+    def _requeue(self, stale_after):
+        requeued = requeue_stale_jobs(stale_after)
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} stale job(s).')
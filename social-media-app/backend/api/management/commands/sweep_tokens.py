@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api.models import TokenExpiry
+
+
+class Command(BaseCommand):
+    help = "Delete expired API tokens in small batches. Run periodically (e.g. from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Tokens deleted per transaction.')
+        parser.add_argument('--pause', type=float, default=0.1,
+                            help='Seconds to wait between batches, so other writers get the database.')
+        parser.add_argument('--max-batches', type=int, default=0, help='Stop after this many batches (0 = drain).')
+
+    def handle(self, *args, **options):
+        now = timezone.now()  # Fixed for the run, so tokens expiring meanwhile wait for the next one
+        deleted = batches = 0
+        while not options['max_batches'] or batches < options['max_batches']:
+            # The oldest expiries first, read from the expires_at index
+            keys = list(
+                TokenExpiry.objects.filter(expires_at__lte=now)
+                .order_by('expires_at')
+                .values_list('token_id', flat=True)[:options['batch_size']]
+            )
+            if not keys:
+                break
+            with transaction.atomic():
+                # Re-checked here: a token used since the read above has slid past ``now``
+                _, per_model = Token.objects.filter(key__in=keys, expiry__expires_at__lte=now).delete()
+            deleted += per_model.get(Token._meta.label, 0)  # Not counting the cascaded TokenExpiry rows
+            batches += 1
+            if len(keys) < options['batch_size']:
+                break
+            time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired token(s) in {batches} batch(es).'))
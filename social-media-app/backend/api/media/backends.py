@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+import uuid
+
+import cloudinary.api
+import cloudinary.uploader
+from cloudinary import CloudinaryResource
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils.module_loading import import_string
+
+
+class CloudinaryUploader:
+    """Uploads straight to Cloudinary with the account configured in settings."""
+
+    def upload(self, file, folder=''):
+        chunk_size = getattr(settings, 'MEDIA_API_CHUNK_SIZE', 6 * 1024 * 1024)
+        if (getattr(file, 'size', None) or 0) > chunk_size:
+            # The SDK reads a whole file into memory; upload_large() holds one chunk at a time
+            return cloudinary.uploader.upload_large(file, folder=folder, chunk_size=chunk_size)
+        return cloudinary.uploader.upload(file, folder=folder)
+
+    def destroy(self, public_id):
+        return cloudinary.uploader.destroy(public_id)
+
+    def destroy_many(self, public_ids):
+        """Delete up to 100 assets in one Admin API call; returns {public_id: 'deleted' | 'not_found'}."""
+        return cloudinary.api.delete_resources(list(public_ids))['deleted']
+
+
+class LocalFakeUploader:
+    """
+    Offline stand-in for Cloudinary: files are copied under FAKE_MEDIA_ROOT and served
+    from FAKE_MEDIA_HOST + FAKE_MEDIA_URL. FAKE_MEDIA_UPLOAD_DELAY (seconds) simulates
+    network latency.
+    """
+
+    def __init__(self):
+        self.storage = FileSystemStorage(
+            location=getattr(settings, 'FAKE_MEDIA_ROOT', settings.BASE_DIR / 'fake_media'),
+            base_url=getattr(settings, 'FAKE_MEDIA_URL', '/fake-media/'),
+        )
+        self.host = getattr(settings, 'FAKE_MEDIA_HOST', 'http://127.0.0.1:8000').rstrip('/')
+        self.delay = getattr(settings, 'FAKE_MEDIA_UPLOAD_DELAY', 0)
+
+    def upload(self, file, folder=''):
+        if self.delay:
+            time.sleep(self.delay)
+        extension = os.path.splitext(getattr(file, 'name', '') or '')[1]
+        public_id = f'{folder}/{uuid.uuid4().hex}' if folder else uuid.uuid4().hex
+        name = self.storage.save(public_id + extension, file)
+        return {'public_id': public_id, 'secure_url': self.host + self.storage.url(name), 'bytes': self.storage.size(name)}
+
+    def destroy(self, public_id):
+        directory, base = os.path.split(public_id)
+        if not self.storage.exists(directory or '.'):
+            return {'result': 'not found'}
+        for name in self.storage.listdir(directory or '.')[1]:
+            if os.path.splitext(name)[0] == base:
+                self.storage.delete(os.path.join(directory, name))
+                return {'result': 'ok'}
+        return {'result': 'not found'}
+
+    def destroy_many(self, public_ids):
+        return {
+            public_id: 'deleted' if self.destroy(public_id)['result'] == 'ok' else 'not_found'
+            for public_id in public_ids
+        }
+
+
+def stored_url(value):
+    """
+    The URL string saved in an image column.
+
+    CloudinaryField hands back a CloudinaryResource whose public_id / format were
+    parsed out of the stored secure_url; this puts the original string back together.
+    """
+    if isinstance(value, CloudinaryResource):
+        if not value.public_id:
+            return ''
+        return f'{value.public_id}.{value.format}' if value.format else value.public_id
+    return value or ''
+
+
+_uploader = None
+_uploader_lock = threading.Lock()
+
+
+def get_uploader():
+    """The process-wide uploader named by settings.MEDIA_UPLOADER."""
+    global _uploader
+    if _uploader is None:
+        with _uploader_lock:
+            # Concurrent first requests would otherwise each build one
+            if _uploader is None:
+                _uploader = import_string(
+                    getattr(settings, 'MEDIA_UPLOADER', 'api.media.backends.CloudinaryUploader')
+                )()
+    return _uploader
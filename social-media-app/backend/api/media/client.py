@@ -0,0 +1,238 @@
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+
+import cloudinary
+import cloudinary.utils
+import urllib3
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Worth another try: throttling and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Bytes read from a file per socket write while streaming an upload
+BODY_CHUNK_SIZE = 64 * 1024
+
+
+class MediaClientError(Exception):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class ClientMetrics:
+    """Thread-safe counters for one client; read with snapshot()."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._values = {
+                'requests': 0, 'retries': 0, 'failures': 0,
+                'latency_total': 0.0, 'latency_max': 0.0,
+            }
+
+    def record(self, latency=None, retry=False, failure=False):
+        with self._lock:
+            if latency is not None:
+                self._values['requests'] += 1
+                self._values['latency_total'] += latency
+                self._values['latency_max'] = max(self._values['latency_max'], latency)
+            self._values['retries'] += retry
+            self._values['failures'] += failure
+
+    def snapshot(self):
+        with self._lock:
+            values = dict(self._values)
+        values['latency_avg'] = values['latency_total'] / values['requests'] if values['requests'] else 0.0
+        return values
+
+
+class CloudinaryClient:
+    """
+    Minimal Cloudinary REST client over one pooled, keep-alive urllib3 PoolManager.
+
+    Every call has connect/read timeouts and is retried on connection errors,
+    timeouts, 429 and 5xx with capped exponential backoff and full jitter. Requests
+    are signed with the SDK helpers, and ``upload_prefix`` in the Cloudinary config
+    (or MEDIA_API_BASE_URL) redirects everything, e.g. to `manage.py fake_cloudinary`.
+    """
+
+    def __init__(self, base_url=None, pool_maxsize=None, connect_timeout=None, read_timeout=None,
+                 max_retries=None, backoff_base=None, backoff_cap=None, chunk_size=None, keep_alive=True):
+        self.base_url = base_url or getattr(settings, 'MEDIA_API_BASE_URL', None)
+        self.timeout = urllib3.Timeout(
+            connect=connect_timeout or getattr(settings, 'MEDIA_API_CONNECT_TIMEOUT', 5.0),
+            read=read_timeout or getattr(settings, 'MEDIA_API_READ_TIMEOUT', 60.0),
+        )
+        self.max_retries = getattr(settings, 'MEDIA_API_MAX_RETRIES', 3) if max_retries is None else max_retries
+        self.backoff_base = backoff_base or getattr(settings, 'MEDIA_API_BACKOFF_BASE', 0.2)
+        self.backoff_cap = backoff_cap or getattr(settings, 'MEDIA_API_BACKOFF_CAP', 5.0)
+        self.keep_alive = keep_alive
+        self.chunk_size = chunk_size or getattr(settings, 'MEDIA_API_CHUNK_SIZE', 6 * 1024 * 1024)
+        self.pool = urllib3.PoolManager(
+            maxsize=pool_maxsize or getattr(settings, 'MEDIA_API_POOL_SIZE', 10),
+            block=False,
+            retries=False,  # Retries are handled (and counted) by _request()
+        )
+        self.metrics = ClientMetrics()
+
+    # -- Cloudinary API ---------------------------------------------------------
+
+    def upload(self, file, folder='', **params):
+        """
+        Stream ``file`` to the upload API without reading it into memory.
+
+        Files up to MEDIA_API_CHUNK_SIZE go in one request; larger ones are sent as
+        consecutive Content-Range chunks sharing an X-Unique-Upload-Id, the way the
+        SDK's upload_large() does. Each chunk is read from the file as it is sent.
+        """
+        if folder:
+            params['folder'] = folder
+        name = (getattr(file, 'name', None) or uuid.uuid4().hex).rsplit('/', 1)[-1]
+        content_type = getattr(file, 'content_type', None) or 'application/octet-stream'
+        size = _file_size(file)
+        url = self._api_url('upload')
+
+        if size <= self.chunk_size:
+            return self._request('POST', url, body=self._multipart(self._signed(params), name, file, 0, size, content_type))
+
+        upload_id = uuid.uuid4().hex
+        result = None
+        for start in range(0, size, self.chunk_size):
+            end = min(start + self.chunk_size, size)
+            headers = {'Content-Range': f'bytes {start}-{end - 1}/{size}', 'X-Unique-Upload-Id': upload_id}
+            result = self._request(
+                'POST', url, headers=headers,
+                body=self._multipart(self._signed(params), name, file, start, end, content_type),
+            )
+            if result.get('public_id'):
+                params['public_id'] = result['public_id']
+        return result
+
+    def destroy(self, public_id):
+        return self._request('POST', self._api_url('destroy'), fields=self._signed({'public_id': public_id}))
+
+    def destroy_many(self, public_ids):
+        """Admin API bulk delete (up to 100 ids); returns {public_id: 'deleted' | 'not_found'}."""
+        url = self._base_url(['resources', 'image', 'upload'])
+        query = [('public_ids[]', public_id) for public_id in public_ids]
+        config = cloudinary.config()
+        headers = urllib3.make_headers(basic_auth=f'{config.api_key}:{config.api_secret}')
+        return self._request('DELETE', url, query=query, headers=headers)['deleted']
+
+    # -- plumbing ---------------------------------------------------------------
+
+    def _base_url(self, path):
+        options = {'upload_prefix': self.base_url} if self.base_url else {}
+        return cloudinary.utils.base_api_url(path, **options)
+
+    def _api_url(self, action):
+        return self._base_url(['image', action])
+
+    def _signed(self, params):
+        config = cloudinary.config()
+        params = {key: value for key, value in params.items() if value is not None}
+        params['timestamp'] = str(int(time.time()))
+        params['signature'] = cloudinary.utils.api_sign_request(params, config.api_secret)
+        params['api_key'] = config.api_key
+        return params
+
+    def _multipart(self, fields, filename, file, start, end, content_type):
+        """
+        A multipart/form-data body carrying ``fields`` and bytes [start, end) of ``file``.
+
+        Returns ``(headers, make_body)``; make_body() yields the body in BODY_CHUNK_SIZE
+        pieces straight from the file and can be called again for a retry.
+        """
+        boundary = uuid.uuid4().hex
+        head = b''.join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n{value}\r\n'.encode()
+            for key, value in fields.items()
+        ) + (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        ).encode()
+        tail = f'\r\n--{boundary}--\r\n'.encode()
+        headers = {
+            'Content-Type': f'multipart/form-data; boundary={boundary}',
+            'Content-Length': str(len(head) + (end - start) + len(tail)),
+        }
+
+        def make_body():
+            yield head
+            file.seek(start)
+            remaining = end - start
+            while remaining:
+                chunk = file.read(min(BODY_CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise MediaClientError(f'{filename} ended {remaining} bytes early')
+                remaining -= len(chunk)
+                yield chunk
+            yield tail
+
+        return headers, make_body
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _request(self, method, url, fields=None, query=None, headers=None, body=None):
+        """``body`` is a ``(headers, make_body)`` pair from _multipart(), sent as a stream."""
+        headers = dict(headers or {})
+        if not self.keep_alive:
+            headers['Connection'] = 'close'
+        if body is not None:
+            body_headers, make_body = body
+            headers.update(body_headers)
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                if body is not None:
+                    response = self.pool.request(
+                        method, url, body=make_body(), headers=headers, timeout=self.timeout,
+                    )
+                elif method == 'DELETE':
+                    response = self.pool.request(method, url, fields=query, headers=headers, timeout=self.timeout)
+                else:
+                    response = self.pool.request_encode_body(
+                        method, url, fields=fields, headers=headers, timeout=self.timeout, encode_multipart=False,
+                    )
+                error = None
+            except (urllib3.exceptions.TimeoutError, urllib3.exceptions.ProtocolError,
+                    urllib3.exceptions.NewConnectionError) as e:
+                response, error = None, e
+            self.metrics.record(latency=time.perf_counter() - started)
+
+            if response is not None and response.status < 400:
+                return json.loads(response.data or b'{}')
+
+            retryable = error is not None or response.status in RETRY_STATUSES
+            if not retryable or attempt >= self.max_retries:
+                self.metrics.record(failure=True)
+                if error is not None:
+                    raise MediaClientError(f'{method} {url} failed: {error}') from error
+                raise MediaClientError(
+                    f'{method} {url} returned {response.status}: {response.data[:200]!r}', status=response.status
+                )
+
+            delay = self._backoff(attempt)
+            logger.info('Retrying %s %s in %.2fs (attempt %s)', method, url, delay, attempt + 1)
+            self.metrics.record(retry=True)
+            time.sleep(delay)
+            attempt += 1
+
+
+def _file_size(file):
+    size = getattr(file, 'size', None)
+    if size is None:
+        file.seek(0, 2)
+        size = file.tell()
+    return size
@@ -0,0 +1,92 @@
+import logging
+import re
+
+from django.db.models import F
+
+from ..models import CustomUser, MediaAsset, MediaDeletion, PostImage
+from .backends import get_uploader, stored_url
+
+logger = logging.getLogger(__name__)
+
+# Cloudinary bulk delete accepts at most 100 public ids per call
+MAX_BATCH_SIZE = 100
+
+# .../upload/[transformations/][v123/]<public_id>[.ext]
+_UPLOAD_URL = re.compile(
+    r'/upload/(?:[a-z]{1,3}_[^,/]+(?:,[a-z]{1,3}_[^,/]+)*/)*(?:v\d+/)?'
+    r'(?P<public_id>[^?#]+?)(?:\.[A-Za-z0-9]+)?(?:[?#].*)?$'
+)
+
+
+def public_id_for_url(url):
+    """The backend public_id behind a stored image URL, or None if it is not ours."""
+    url = stored_url(url)
+    if not url:
+        return None
+    asset = MediaAsset.objects.filter(url=url).only('public_id').first()
+    if asset is not None:
+        return asset.public_id
+    # Uploaded before assets were recorded: fall back to the Cloudinary URL layout
+    match = _UPLOAD_URL.search(url)
+    return match.group('public_id') if match else None
+
+
+def queue_deletions(public_ids):
+    """Queue assets for deletion; nothing is sent to the backend on this path."""
+    public_ids = {public_id for public_id in public_ids if public_id}
+    MediaDeletion.objects.bulk_create(
+        [MediaDeletion(public_id=public_id) for public_id in public_ids], ignore_conflicts=True
+    )
+
+
+def queue_deletion_for_url(url):
+    queue_deletions([public_id_for_url(url)])
+
+
+def _still_referenced(public_ids):
+    """Public ids whose asset is still used by a post image or a profile (dedupe shares assets)."""
+    urls = dict(MediaAsset.objects.filter(public_id__in=public_ids).values_list('url', 'public_id'))
+    if not urls:
+        return set()
+    used = {stored_url(image) for image in PostImage.objects.filter(image__in=urls).values_list('image', flat=True)}
+    used |= set(CustomUser.objects.filter(image__in=urls).values_list('image', flat=True))
+    return {urls[url] for url in used}
+
+
+def flush_deletions(batch_size=MAX_BATCH_SIZE, max_attempts=5):
+    """
+    Delete up to ``batch_size`` queued assets with one bulk backend call.
+
+    Assets that became referenced again since they were queued are dropped from the
+    queue without deleting them. Returns ``(deleted, skipped, failed)`` counts.
+    """
+    batch = list(
+        MediaDeletion.objects.filter(attempts__lt=max_attempts).order_by('id')[:min(batch_size, MAX_BATCH_SIZE)]
+    )
+    if not batch:
+        return 0, 0, 0
+    public_ids = [deletion.public_id for deletion in batch]
+
+    referenced = _still_referenced(public_ids)
+    to_delete = [public_id for public_id in public_ids if public_id not in referenced]
+
+    try:
+        outcome = get_uploader().destroy_many(to_delete) if to_delete else {}
+    except Exception as e:
+        logger.warning('Bulk delete of %s asset(s) failed: %s', len(to_delete), e)
+        MediaDeletion.objects.filter(public_id__in=to_delete).update(
+            attempts=F('attempts') + 1, last_error=str(e)
+        )
+        MediaDeletion.objects.filter(public_id__in=referenced).delete()
+        return 0, len(referenced), len(to_delete)
+
+    # 'not_found' counts as done: the asset is gone either way
+    done = [public_id for public_id in to_delete if outcome.get(public_id) in ('deleted', 'not_found')]
+    failed = [public_id for public_id in to_delete if public_id not in done]
+    MediaAsset.objects.filter(public_id__in=done).delete()
+    MediaDeletion.objects.filter(public_id__in=done + list(referenced)).delete()
+    if failed:
+        MediaDeletion.objects.filter(public_id__in=failed).update(
+            attempts=F('attempts') + 1, last_error='Not deleted by the media backend'
+        )
+    return len(done), len(referenced), len(failed)
@@ -0,0 +1,139 @@
+import logging
+import os
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Exists, F, OuterRef, Value, When
+from django.utils import timezone
+
+from ..models import MediaStatus, MediaUploadJob, Post, PostImage
+from .pipeline import image_metadata, store_image
+from .processing import InvalidImage
+from .spool import discard_spooled_file, spool_storage
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = getattr(settings, 'MEDIA_UPLOAD_MAX_ATTEMPTS', 3)
+
+
+def enqueue_post_images(post, files, folder='post_images'):
+    """
+    Create one pending PostImage slot per file, in order, and queue its upload.
+
+    Files are spooled to disk so the request can return immediately; the post is
+    marked pending until `manage.py run_media_worker` has processed every slot.
+    """
+    if not files:
+        return []
+    storage = spool_storage()
+    images = []
+    with transaction.atomic():
+        Post.objects.filter(pk=post.pk).update(media_status=MediaStatus.PENDING, version=F('version') + 1)
+        post.media_status = MediaStatus.PENDING
+        for file in files:
+            extension = os.path.splitext(file.name or '')[1]
+            source = storage.save(f'{uuid.uuid4().hex}{extension}', file)
+            image = PostImage.objects.create(post=post, status=MediaStatus.PENDING)
+            MediaUploadJob.objects.create(post_image=image, source=source, folder=folder)
+            images.append(image)
+    return images
+
+
+def claim_next_job():
+    """
+    Atomically take the oldest queued job, or return None when the queue is empty.
+
+    The claim is a conditional UPDATE, so it is safe with any number of worker threads
+    or processes on any database backend.
+    """
+    while True:
+        job = MediaUploadJob.objects.filter(state=MediaUploadJob.State.QUEUED).order_by('id').first()
+        if job is None:
+            return None
+        claimed = MediaUploadJob.objects.filter(pk=job.pk, state=MediaUploadJob.State.QUEUED).update(
+            state=MediaUploadJob.State.RUNNING, attempts=F('attempts') + 1, updated_at=timezone.now()
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def process_job(job):
+    """Upload one claimed job and record the outcome on its PostImage slot."""
+    storage = spool_storage()
+    try:
+        with storage.open(job.source, 'rb') as file:
+            result = store_image(file, folder=job.folder)
+    except Exception as e:
+        return _retry_or_fail(job, e, retryable=not isinstance(e, InvalidImage))
+
+    try:
+        _finish_image(job, status=MediaStatus.READY, result=result)
+    except Exception as e:
+        # Uploaded, but not recorded: the spooled file is still there, so upload it again
+        return _retry_or_fail(job, e)
+    _set_job_state(job, MediaUploadJob.State.DONE)
+    discard_spooled_file(job.source)
+    return True
+
+
+def _retry_or_fail(job, error, retryable=True):
+    logger.warning('Upload job %s failed (attempt %s): %s', job.pk, job.attempts, error)
+    retry = retryable and job.attempts < MAX_ATTEMPTS
+    _set_job_state(job, MediaUploadJob.State.QUEUED if retry else MediaUploadJob.State.FAILED, str(error))
+    if not retry:
+        _finish_image(job, status=MediaStatus.FAILED)
+        discard_spooled_file(job.source)
+    return False
+
+
+def _set_job_state(job, state, error=''):
+    # An UPDATE rather than save(): the job is gone if its post was deleted meanwhile
+    job.state, job.last_error = state, error
+    MediaUploadJob.objects.filter(pk=job.pk).update(state=state, last_error=error, updated_at=timezone.now())
+
+
+def _finish_image(job, status, result=None):
+    # Read before opening the transaction so it starts with a write (SQLite cannot
+    # upgrade a read transaction to a write one while another writer is waiting)
+    image = PostImage.objects.filter(pk=job.post_image_id).first()
+    if image is not None:  # The post may have been deleted meanwhile
+        image.status = status
+        if result:
+            image.image = result['secure_url']
+            for field, value in image_metadata(result).items():
+                setattr(image, field, value)
+        with transaction.atomic():
+            image.save()  # Bumps the post's version via api.signals
+            settle_post_media_status(image.post_id)
+
+
+def settle_post_media_status(post_id):
+    """
+    Once none of a pending post's images are still pending, set its media_status: ready
+    when they all uploaded, failed when none did and partial otherwise. One UPDATE, so
+    workers finishing a post's last images at the same time cannot both miss it.
+    """
+    images = PostImage.objects.filter(post=OuterRef('pk'))
+    has_ready = Exists(images.filter(status=MediaStatus.READY))
+    has_failed = Exists(images.filter(status=MediaStatus.FAILED))
+    return (
+        Post.objects.filter(pk=post_id, media_status=MediaStatus.PENDING)
+        .exclude(images__status=MediaStatus.PENDING)
+        .update(
+            media_status=Case(
+                When(has_failed & has_ready, then=Value(MediaStatus.PARTIAL)),
+                When(has_failed, then=Value(MediaStatus.FAILED)),
+                default=Value(MediaStatus.READY),
+            ),
+            version=F('version') + 1,
+        )
+    )
+
+
+def requeue_stale_jobs(older_than):
+    """Put jobs left running by a crashed worker, or a failed state write, back on the queue."""
+    return MediaUploadJob.objects.filter(
+        state=MediaUploadJob.State.RUNNING, updated_at__lt=timezone.now() - older_than
+    ).update(state=MediaUploadJob.State.QUEUED, updated_at=timezone.now())
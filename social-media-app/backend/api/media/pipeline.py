@@ -0,0 +1,122 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from ..models import MediaAsset, Post, PostImage
+from ..signals import bump_post_versions
+from .backends import get_uploader
+from .processing import content_hash, normalize_image
+
+UPLOAD_CONCURRENCY = getattr(settings, 'MEDIA_UPLOAD_CONCURRENCY', 4)
+
+
+def store_image(file, folder=''):
+    """
+    Normalize and upload one image unless identical bytes were stored before.
+
+    Returns the uploader-style result dict (``secure_url``, ``public_id``, ...) with
+    ``deduplicated`` set when an existing asset was reused; raises on failure.
+    """
+    results, errors = store_images([file], folder)
+    if errors:
+        raise errors[0][1]
+    return results[0]
+
+
+def store_images(files, folder='', max_workers=UPLOAD_CONCURRENCY):
+    """
+    Store several images at once and return ``(results, errors)``.
+
+    ``results`` is aligned with ``files`` (None where that file failed) and ``errors``
+    lists ``(index, exception)`` pairs. Known content hashes are resolved with one
+    query; the remaining distinct files are normalized and uploaded concurrently on a
+    bounded thread pool, so the batch takes about as long as its slowest upload. New
+    assets are then recorded with a single bulk_create.
+    """
+    digests = [content_hash(file) for file in files]
+    assets = {asset.content_hash: asset for asset in MediaAsset.objects.filter(content_hash__in=digests)}
+
+    pending = {}  # digest -> index of the first file with those bytes
+    for index, digest in enumerate(digests):
+        if digest not in assets:
+            pending.setdefault(digest, index)
+
+    failures = {}  # digest -> exception
+    if pending:
+        def upload(index):
+            # No DB access in here: worker threads only do CPU and network work
+            normalized, (width, height), placeholder = normalize_image(files[index])
+            try:
+                return get_uploader().upload(normalized, folder=folder), width, height, placeholder
+            finally:
+                if normalized is not files[index]:
+                    normalized.close()  # Drops the spooled temporary file right away
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as pool:
+            futures = {digest: pool.submit(upload, index) for digest, index in pending.items()}
+
+        new_assets = []
+        for digest, future in futures.items():
+            try:
+                result, width, height, placeholder = future.result()
+            except Exception as e:
+                failures[digest] = e
+                continue
+            new_assets.append(MediaAsset(
+                content_hash=digest,
+                public_id=result['public_id'],
+                url=result['secure_url'],
+                bytes=result.get('bytes'),
+                width=result.get('width') or width,
+                height=result.get('height') or height,
+                placeholder=placeholder,
+            ))
+        # A concurrent request may have stored the same bytes; its row wins
+        MediaAsset.objects.bulk_create(new_assets, ignore_conflicts=True)
+        assets.update(
+            (asset.content_hash, asset)
+            for asset in MediaAsset.objects.filter(content_hash__in=[a.content_hash for a in new_assets])
+        )
+
+    results, errors = [], []
+    for index, digest in enumerate(digests):
+        if digest in failures:
+            results.append(None)
+            errors.append((index, failures[digest]))
+        else:
+            results.append(_result(assets[digest], deduplicated=pending.get(digest) != index))
+    return results, errors
+
+
+def attach_post_images(post, results):
+    """Create the PostImage rows for ``results`` (in order, skipping failures) in one INSERT."""
+    images = PostImage.objects.bulk_create([
+        PostImage(post=post, image=result['secure_url'], **image_metadata(result))
+        for result in results if result
+    ])
+    if images:
+        # bulk_create skips the post_save receivers, so invalidate the cached post here
+        bump_post_versions(Post.objects.filter(pk=post.pk))
+    return images
+
+
+def image_metadata(result):
+    """PostImage fields recorded from a store_image() result."""
+    return {
+        'public_id': result['public_id'],
+        'width': result['width'],
+        'height': result['height'],
+        'placeholder': result['placeholder'],
+    }
+
+
+def _result(asset, deduplicated):
+    return {
+        'secure_url': asset.url,
+        'public_id': asset.public_id,
+        'bytes': asset.bytes,
+        'width': asset.width,
+        'height': asset.height,
+        'placeholder': asset.placeholder,
+        'deduplicated': deduplicated,
+    }
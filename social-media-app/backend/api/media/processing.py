@@ -0,0 +1,95 @@
+import base64
+import hashlib
+import io
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Optional: without Pillow images are uploaded as received
+    Image = None
+
+MAX_DIMENSION = getattr(settings, 'MEDIA_IMAGE_MAX_DIMENSION', 2048)
+OUTPUT_FORMAT = getattr(settings, 'MEDIA_IMAGE_FORMAT', 'WEBP')
+QUALITY = getattr(settings, 'MEDIA_IMAGE_QUALITY', 82)
+
+# Longest side of the blurred placeholder embedded in API responses
+PLACEHOLDER_SIZE = getattr(settings, 'MEDIA_PLACEHOLDER_SIZE', 16)
+
+# Encoded output past this size moves from memory to a temporary file
+SPOOL_MAX_MEMORY = getattr(settings, 'FILE_UPLOAD_MAX_MEMORY_SIZE', 1024 * 1024)
+
+_EXTENSIONS = {'WEBP': '.webp', 'JPEG': '.jpg', 'PNG': '.png', 'AVIF': '.avif'}
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def content_hash(file):
+    """SHA-256 of the file's bytes, read in chunks; the file is rewound afterwards."""
+    digest = hashlib.sha256()
+    file.seek(0)
+    chunks = file.chunks() if hasattr(file, 'chunks') else iter(lambda: file.read(64 * 1024), b'')
+    for chunk in chunks:
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def placeholder_for(image):
+    """A tiny WebP of ``image`` as a data: URI, shown blurred while the real image loads."""
+    preview = image.convert('RGB')
+    preview.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    output = io.BytesIO()
+    preview.save(output, format='WEBP', quality=30)
+    return 'data:image/webp;base64,' + base64.b64encode(output.getvalue()).decode()
+
+
+def normalize_image(file):
+    """
+    Re-encode an uploaded image for delivery.
+
+    Applies the EXIF orientation, then drops all metadata (EXIF, GPS, ICC comments),
+    shrinks the longest side to MEDIA_IMAGE_MAX_DIMENSION and encodes it as
+    MEDIA_IMAGE_FORMAT. JPEGs are decoded at reduced scale where possible, and the
+    output is spooled to disk past FILE_UPLOAD_MAX_MEMORY_SIZE. Animated images and
+    installs without Pillow pass through unchanged. Returns ``(file, (width, height),
+    placeholder)``; the size is (None, None) and the placeholder '' when the image
+    was not decoded.
+    """
+    if Image is None:
+        return file, (None, None), ''
+
+    file.seek(0)
+    try:
+        with Image.open(file) as source:
+            if getattr(source, 'is_animated', False):
+                file.seek(0)
+                return file, source.size, placeholder_for(source)
+            source.draft(None, (MAX_DIMENSION, MAX_DIMENSION))  # JPEG: decode at 1/2, 1/4 or 1/8 size
+            image = ImageOps.exif_transpose(source)
+            image.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.Resampling.LANCZOS)
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if 'transparency' in image.info or 'A' in image.mode else 'RGB')
+            if OUTPUT_FORMAT == 'JPEG' and image.mode == 'RGBA':
+                image = image.convert('RGB')
+
+            placeholder = placeholder_for(image)
+            output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+            # Saving without exif=/icc_profile= is what strips the metadata
+            image.save(output, format=OUTPUT_FORMAT, quality=QUALITY, optimize=True)
+    except (OSError, Image.DecompressionBombError) as e:
+        raise InvalidImage(f'Not a valid image: {e}')
+
+    base = os.path.splitext(os.path.basename(getattr(file, 'name', '') or 'image'))[0]
+    size = output.tell()
+    output.seek(0)
+    normalized = UploadedFile(
+        output, base + _EXTENSIONS.get(OUTPUT_FORMAT, ''),
+        content_type=f'image/{OUTPUT_FORMAT.lower()}', size=size,
+    )
+    return normalized, image.size, placeholder
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+
+
+def spool_storage():
+    """Where uploaded files wait until a worker picks up their job."""
+    return FileSystemStorage(location=getattr(settings, 'MEDIA_SPOOL_ROOT', settings.BASE_DIR / 'media_spool'))
+
+
+def discard_spooled_file(source):
+    """Delete a job's spooled upload, if it is still there."""
+    storage = spool_storage()
+    if storage.exists(source):
+        storage.delete(source)
@@ -0,0 +1,194 @@
+"""
+Local stand-in for the parts of the Cloudinary API that api.media uses.
+
+Serves upload / destroy / bulk delete under the real URL layout, stores files in a
+directory and serves them back, so the whole media path can run and be load-tested
+offline. It does not check signatures.
+"""
+import json
+import os
+import random
+import re
+import shutil
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.core.handlers.wsgi import LimitedStream
+from django.http.multipartparser import MultiPartParser
+
+_API_PATH = re.compile(r'^/v1_1/(?P<cloud>[^/]+)/(?P<rest>.+)$')
+_CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+    # Headers and body go out in separate writes; with Nagle on, every reused connection
+    # waits out the client's delayed ACK (~40ms) and keep-alive benchmarks slower than reconnecting
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    # -- routing ----------------------------------------------------------------
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if not path.startswith('/files/'):
+            return self._json(404, {'error': {'message': 'Not found'}})
+        full_path = self._file_path(path[len('/files/'):])
+        if not os.path.isfile(full_path):
+            return self._json(404, {'error': {'message': 'Not found'}})
+        with open(full_path, 'rb') as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        match = _API_PATH.match(urlsplit(self.path).path)
+        if match and match['rest'] == 'image/upload':
+            return self._upload()
+        body = self._read_body()
+        if self._simulate():
+            return
+        if match and match['rest'] == 'image/destroy':
+            public_id = parse_qs(body.decode()).get('public_id', [''])[0]
+            return self._json(200, {'result': 'ok' if self._delete(public_id) else 'not found'})
+        self._json(404, {'error': {'message': 'Unsupported endpoint'}})
+
+    def do_DELETE(self):
+        parts = urlsplit(self.path)
+        match = _API_PATH.match(parts.path)
+        self._read_body()
+        if self._simulate():
+            return
+        if match and match['rest'] == 'resources/image/upload':
+            public_ids = parse_qs(parts.query).get('public_ids[]', [])
+            deleted = {public_id: 'deleted' if self._delete(public_id) else 'not_found' for public_id in public_ids}
+            return self._json(200, {'deleted': deleted})
+        self._json(404, {'error': {'message': 'Unsupported endpoint'}})
+
+    # -- endpoints --------------------------------------------------------------
+
+    def _upload(self):
+        # Parsed as a stream: the file part goes to a temporary file, never into memory
+        meta = {'CONTENT_TYPE': self.headers['Content-Type'], 'CONTENT_LENGTH': self.headers['Content-Length']}
+        body = LimitedStream(self.rfile, int(meta['CONTENT_LENGTH']))  # Don't read into the next request
+        fields, files = MultiPartParser(meta, body, [TemporaryFileUploadHandler()]).parse()
+        if self._simulate():
+            return
+        upload = files.get('file')
+        if upload is None:
+            return self._json(400, {'error': {'message': 'Missing required parameter - file'}})
+
+        content_range = _CONTENT_RANGE.match(self.headers.get('Content-Range', ''))
+        if content_range:
+            # Chunked upload: write this part at its offset and answer for the whole file on the last one
+            start, end, total = (int(value) for value in content_range.groups())
+            partial_path = self._file_path(os.path.join('.partial', self.headers.get('X-Unique-Upload-Id', 'upload')))
+            os.makedirs(os.path.dirname(partial_path), exist_ok=True)
+            with open(partial_path, 'r+b' if os.path.exists(partial_path) else 'wb') as partial:
+                partial.seek(start)
+                shutil.copyfileobj(upload, partial)
+            if end + 1 < total:
+                return self._json(200, {'done': False, 'bytes': end + 1})
+            size = total
+        else:
+            partial_path, size = None, upload.size
+
+        extension = os.path.splitext(upload.name or '')[1]
+        folder = fields.get('folder', '').strip('/')
+        public_id = fields.get('public_id') or (f'{folder}/{uuid.uuid4().hex}' if folder else uuid.uuid4().hex)
+        full_path = self._file_path(public_id + extension)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        if partial_path:
+            shutil.move(partial_path, full_path)
+        else:
+            with open(full_path, 'wb') as out:
+                upload.seek(0)
+                shutil.copyfileobj(upload, out)
+        upload.close()
+
+        host = self.headers.get('Host', f'127.0.0.1:{self.server.server_port}')
+        self._json(200, {
+            'public_id': public_id,
+            'version': int(time.time()),
+            'format': extension.lstrip('.'),
+            'resource_type': 'image',
+            'bytes': size,
+            'secure_url': f'http://{host}/files/{public_id}{extension}',
+        })
+
+    def _delete(self, public_id):
+        directory, base = os.path.split(self._file_path(public_id))
+        if not os.path.isdir(directory):
+            return False
+        for name in os.listdir(directory):
+            if os.path.splitext(name)[0] == base:
+                os.remove(os.path.join(directory, name))
+                return True
+        return False
+
+    # -- helpers ----------------------------------------------------------------
+
+    def _simulate(self):
+        """Apply the configured latency and random failures; True if a failure was sent."""
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.failure_rate and random.random() < self.server.failure_rate:
+            self._json(503, {'error': {'message': 'Simulated failure'}})
+            return True
+        return False
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _file_path(self, relative):
+        full_path = os.path.normpath(os.path.join(self.server.root, relative))
+        if not full_path.startswith(os.path.normpath(self.server.root) + os.sep):
+            raise ValueError('Path escapes the storage root')
+        return full_path
+
+    def _json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, root, latency=0.0, failure_rate=0.0, verbose=False):
+        super().__init__(address, StandInHandler)
+        self.root = str(root)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.verbose = verbose
+        self.connections_accepted = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    def get_request(self):
+        request = super().get_request()
+        self.connections_accepted += 1  # Only the serving thread accepts, so no lock needed
+        return request
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start_in_thread(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig
+from django.core.files.uploadhandler import FileUploadHandler
+
+MAX_FILE_BYTES = getattr(settings, 'MEDIA_UPLOAD_MAX_FILE_BYTES', 20 * 1024 * 1024)
+MAX_REQUEST_BYTES = getattr(settings, 'MEDIA_UPLOAD_MAX_REQUEST_BYTES', 100 * 1024 * 1024)
+
+
+class UploadTooLarge(RequestDataTooBig):
+    """
+    Raised while the body is parsed. The upload views answer it with a 413; anywhere
+    else Django treats it like any SuspiciousOperation, as a 400.
+    """
+
+
+class MaxSizeUploadHandler(FileUploadHandler):
+    """
+    First entry in FILE_UPLOAD_HANDLERS: rejects oversized uploads while they stream in.
+
+    A multipart body whose Content-Length is over MEDIA_UPLOAD_MAX_REQUEST_BYTES is
+    refused before any of it is read, and a single file is cut off as soon as it passes
+    MEDIA_UPLOAD_MAX_FILE_BYTES. Chunks are passed on unchanged to the memory /
+    temporary-file handlers that follow, so nothing is buffered here.
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length > MAX_REQUEST_BYTES:
+            raise UploadTooLarge(f'Request body is larger than {MAX_REQUEST_BYTES} bytes.')
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > MAX_FILE_BYTES:
+            raise UploadTooLarge(f'{self.file_name} is larger than {MAX_FILE_BYTES} bytes.')
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None  # Let the next handler build the file object
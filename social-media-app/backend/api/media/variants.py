@@ -0,0 +1,33 @@
+from django.conf import settings
+
+from .backends import stored_url
+
+# Widths offered in srcset; the original width is added when it is smaller than the largest
+POST_IMAGE_WIDTHS = getattr(settings, 'MEDIA_IMAGE_WIDTHS', (320, 640, 960, 1280, 2048))
+AVATAR_WIDTHS = getattr(settings, 'MEDIA_AVATAR_WIDTHS', (48, 96, 192))
+
+# Never upscale; let Cloudinary pick the format (AVIF/WebP/JPEG) and quality per browser
+DELIVERY_TRANSFORMATION = 'c_limit,f_auto,q_auto'
+_UPLOAD_SEGMENT = '/image/upload/'
+
+
+def variant_url(url, width):
+    """
+    ``url`` resized to ``width`` pixels wide, or None when it is not a Cloudinary
+    delivery URL (e.g. the local fake uploader), which cannot be transformed.
+    """
+    url = stored_url(url)
+    if _UPLOAD_SEGMENT not in url:
+        return None
+    head, tail = url.split(_UPLOAD_SEGMENT, 1)
+    return f'{head}{_UPLOAD_SEGMENT}w_{width},{DELIVERY_TRANSFORMATION}/{tail}'
+
+
+def srcset(url, widths, max_width=None):
+    """A ``srcset`` attribute value for ``url``, or '' when it cannot be resized."""
+    if not url or variant_url(url, widths[0]) is None:
+        return ''
+    chosen = [width for width in widths if max_width is None or width < max_width]
+    if max_width and max_width <= widths[-1]:
+        chosen.append(max_width)
+    return ', '.join(f'{variant_url(url, width)} {width}w' for width in chosen)
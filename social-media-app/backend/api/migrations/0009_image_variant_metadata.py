@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:40
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_from_assets(apps, schema_editor):
+    # Images uploaded since MediaAsset existed already have their metadata recorded there
+    MediaAsset = apps.get_model('api', 'MediaAsset')
+    PostImage = apps.get_model('api', 'PostImage')
+    CustomUser = apps.get_model('api', 'CustomUser')
+
+    def asset(column, url_field):
+        return Subquery(MediaAsset.objects.filter(url=OuterRef(url_field)).values(column)[:1])
+
+    PostImage.objects.exclude(image='').update(
+        public_id=Coalesce(asset('public_id', 'image'), Value('')),
+        width=asset('width', 'image'),
+        height=asset('height', 'image'),
+    )
+    CustomUser.objects.exclude(image='').update(
+        image_public_id=Coalesce(asset('public_id', 'image'), Value('')),
+        image_width=asset('width', 'image'),
+        image_height=asset('height', 'image'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_media_deletions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='image_placeholder',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='image_public_id',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mediaasset',
+            name='placeholder',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='postimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='postimage',
+            name='placeholder',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='postimage',
+            name='public_id',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='postimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_from_assets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:58
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def expire_existing_tokens(apps, schema_editor):
+    # Tokens issued before expiry existed get one full lifetime from now
+    Token = apps.get_model('authtoken', 'Token')
+    TokenExpiry = apps.get_model('api', 'TokenExpiry')
+    expires_at = timezone.now() + timedelta(seconds=getattr(settings, 'AUTH_TOKEN_LIFETIME', 60 * 60 * 24 * 30))
+    TokenExpiry.objects.bulk_create(
+        (TokenExpiry(token_id=key, expires_at=expires_at) for key in Token.objects.values_list('key', flat=True).iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_comment_threads'),
+        ('authtoken', '0004_alter_tokenproxy_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenExpiry',
+            fields=[
+                ('token', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='expiry', serialize=False, to='authtoken.token')),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name_plural': 'token expiries',
+            },
+        ),
+        migrations.RunPython(expire_existing_tokens, migrations.RunPython.noop),
+    ]
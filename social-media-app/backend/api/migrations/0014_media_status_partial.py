@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_token_expiry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='media_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed'), ('partial', 'Partially failed')], default='ready', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='postimage',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed'), ('partial', 'Partially failed')], default='ready', max_length=10),
+        ),
+    ]
@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from cloudinary.models import CloudinaryField
+from rest_framework.authtoken.models import Token
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -29,6 +30,11 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     last_name = models.CharField(max_length=30, blank=True)
     bio = models.TextField(blank=True)
     image = models.URLField(blank=True)
+    # Upload metadata for the avatar, used to build its srcset (see api.media.variants)
+    image_public_id = models.CharField(max_length=255, blank=True)
+    image_width = models.PositiveIntegerField(null=True, blank=True)
+    image_height = models.PositiveIntegerField(null=True, blank=True)
+    image_placeholder = models.TextField(blank=True)  # Tiny blurred preview as a data: URI
     date_of_birth = models.DateField(null=True, blank=True)
     gender = models.CharField(max_length=10, blank=True)
     is_active = models.BooleanField(default=True)
@@ -42,6 +48,18 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.email
 
+    def get_full_name(self):
+        # Empty rather than the email when no name is set: this is shown to other users
+        return f'{self.first_name} {self.last_name}'.strip()
+
+
+# Media processing states shared by Post and PostImage
+class MediaStatus(models.TextChoices):
+    PENDING = 'pending', 'Pending'
+    READY = 'ready', 'Ready'
+    FAILED = 'failed', 'Failed'
+    PARTIAL = 'partial', 'Partially failed'  # Posts only: some images uploaded, others failed
+
 
 # Post Model
 class Post(models.Model):
@@ -49,18 +67,36 @@ class Post(models.Model):
     content = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     tagged_users = models.ManyToManyField(CustomUser, related_name='tagged_posts', blank=True)
+    # Denormalized engagement counters, kept in step by api.signals
+    # (run `manage.py recount_engagement` to repair any drift)
+    like_count = models.PositiveIntegerField(default=0)
+    share_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    # Bumped whenever anything in the post's serialized form changes; part of the
+    # fragment cache key in api.cache
+    version = models.PositiveIntegerField(default=1)
+    # 'pending' while image uploads are still queued (see api.media.jobs)
+    media_status = models.CharField(max_length=10, choices=MediaStatus.choices, default=MediaStatus.READY)
+
+    class Meta:
+        indexes = [
+            # Backs keyset pagination of the feed on (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='post_feed_idx'),
+            # Backs the per-user profile timeline
+            models.Index(fields=['user', '-created_at', '-id'], name='post_user_timeline_idx'),
+        ]
 
     def __str__(self):
         return f'Post by {self.user.email} - {self.content[:30]}'
 
-    def like_count(self):
-        return self.likes.count()
-
-    def share_count(self):
-        return self.shares.count()
-
-    def comment_count(self):
-        return self.post_comments.count()  
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        self.version = models.F('version') + 1
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=['version'])
 
 
 # Like Model (Instead of ManyToMany Field)
@@ -83,6 +119,13 @@ class Share(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     message = models.TextField(blank=True)  # Optional message when sharing
 
+    class Meta:
+        indexes = [
+            # "Did this user share these posts?" for the feed's shared_by_me (Like gets the
+            # same (user_id, post_id) index from unique_together)
+            models.Index(fields=['user', 'post'], name='share_user_post_idx'),
+        ]
+
     def __str__(self):
         return f'{self.user.email} shared Post {self.post.id}'
 
@@ -90,7 +133,16 @@ class Share(models.Model):
 # Post Image Model
 class PostImage(models.Model):
     post = models.ForeignKey(Post, related_name="images", on_delete=models.CASCADE)
-    image = CloudinaryField("image")
+    image = CloudinaryField("image", blank=True)  # Empty until the upload job finishes
+    status = models.CharField(max_length=10, choices=MediaStatus.choices, default=MediaStatus.READY)
+    # Copied from the upload result so clients can pick a srcset width and reserve space
+    public_id = models.CharField(max_length=255, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    placeholder = models.TextField(blank=True)  # Tiny blurred preview as a data: URI
+
+    class Meta:
+        ordering = ['id']  # Upload order
 
     def __str__(self):
         return f"Image for Post {self.post.id}"
@@ -98,10 +150,113 @@ class PostImage(models.Model):
 
 # Comment Model
 class Comment(models.Model):
+    # Replies nest at most this deep (the path column has room for ~23 levels)
+    MAX_DEPTH = 20
+
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='comments')
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='post_comments')  
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Threading: ``path`` is the zero-padded ids from the top-level comment down to this
+    # one ("0000000042/0000000057/"), so a subtree is one range scan on (root, path) and
+    # sorting by path gives the thread in reply order
+    parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='replies')
+    root = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='+')
+    path = models.CharField(max_length=255, blank=True)
+    depth = models.PositiveSmallIntegerField(default=0)
+    # Replies anywhere below a top-level comment, kept in step by api.signals
+    reply_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Backs keyset pagination of a post's comments and the feed's comment previews
+            models.Index(fields=['post', '-created_at', '-id'], name='comment_post_timeline_idx'),
+            # Backs subtree and first-N-replies reads
+            models.Index(fields=['root', 'path'], name='comment_thread_path_idx'),
+        ]
 
     def __str__(self):
         return f'Comment by {self.user.email} on {self.created_at}'
+
+    @staticmethod
+    def path_segment(pk):
+        return f'{pk:010d}/'
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        if self.parent_id:
+            self.depth = self.parent.depth + 1
+            self.root_id = self.parent.root_id
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # The path ends with this comment's own id, so it is written right after the INSERT
+            self.path = (self.parent.path if self.parent_id else '') + self.path_segment(self.pk)
+            self.root_id = self.root_id or self.pk
+            Comment.objects.filter(pk=self.pk).update(path=self.path, root_id=self.root_id)
+
+
+# Every file stored on the media backend, indexed by content hash so identical
+# uploads reuse the existing asset (see api.media.pipeline)
+class MediaAsset(models.Model):
+    content_hash = models.CharField(max_length=64, unique=True)  # SHA-256 of the original upload
+    public_id = models.CharField(max_length=255)
+    url = models.URLField(max_length=500, db_index=True)
+    bytes = models.PositiveIntegerField(null=True, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    placeholder = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.public_id
+
+
+# Queued upload of one PostImage slot, processed by `manage.py run_media_worker`
+class MediaUploadJob(models.Model):
+    class State(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+
+    post_image = models.OneToOneField(PostImage, on_delete=models.CASCADE, related_name='upload_job')
+    source = models.CharField(max_length=255)  # Spooled file name in MEDIA_SPOOL_ROOT
+    folder = models.CharField(max_length=100, blank=True)
+    state = models.CharField(max_length=10, choices=State.choices, default=State.QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['state', 'id'], name='mediauploadjob_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f'Upload job {self.id} ({self.state}) for image {self.post_image_id}'
+
+
+# Media backend asset waiting to be deleted by `manage.py flush_media_deletions`
+class MediaDeletion(models.Model):
+    public_id = models.CharField(max_length=255, unique=True)
+    queued_at = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f'Delete {self.public_id}'
+
+
+# When an API token stops working; rest_framework.authtoken has no expiry of its own.
+# Created with every token (see api.signals) and pushed forward as it is used (see api.authentication)
+class TokenExpiry(models.Model):
+    token = models.OneToOneField(Token, primary_key=True, on_delete=models.CASCADE, related_name='expiry')
+    expires_at = models.DateTimeField(db_index=True)  # Backs `manage.py sweep_tokens`
+
+    class Meta:
+        verbose_name_plural = 'token expiries'
+
+    def __str__(self):
+        return f'Token of user {self.token.user_id} expires {self.expires_at}'
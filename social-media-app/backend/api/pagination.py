@@ -0,0 +1,84 @@
+import base64
+import binascii
+import json
+import re
+from datetime import datetime
+
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Streamed pages are encoded chunk by chunk, so they can safely be much larger
+MAX_STREAM_PAGE_SIZE = 1000
+
+# A materialized comment path: zero-padded ids, one segment per level (see Comment.path_segment)
+PATH_CURSOR_RE = re.compile(r'^(\d{10}/)+$')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at, pk):
+    """Pack a (created_at, id) position into an opaque URL-safe token."""
+    raw = json.dumps([created_at.isoformat(), pk], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def decode_cursor(cursor):
+    """Reverse of encode_cursor(). Raises InvalidCursor on anything malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(pk)
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor.')
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE, minimum=1):
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise InvalidCursor('limit must be an integer.')
+    return max(minimum, min(limit, maximum))
+
+
+def paginate_keyset(queryset, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Return one page of ``queryset`` ordered newest first, plus the cursor for the next page.
+
+    Seeks past the cursor with ``(created_at, id) < (c, i)`` so every page is an index
+    range scan on (created_at DESC, id DESC) rather than an OFFSET scan.
+    """
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    rows = list(queryset.order_by('-created_at', '-id')[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+
+def paginate_path(queryset, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Return one page of a comment thread in path order, plus the cursor for the next page.
+
+    The cursor is the last path served; ``path > cursor`` keeps every page a range scan
+    on the (root, path) index.
+    """
+    if cursor:
+        if not PATH_CURSOR_RE.match(cursor):
+            raise InvalidCursor('Invalid cursor.')
+        queryset = queryset.filter(path__gt=cursor)
+
+    rows = list(queryset.order_by('path')[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].path
+    return rows, next_cursor
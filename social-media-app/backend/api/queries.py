@@ -0,0 +1,174 @@
+from collections import defaultdict
+
+from django.db.models import CharField, Count, F, IntegerField, OuterRef, Prefetch, Subquery, Value, Window
+from django.db.models.functions import Coalesce, RowNumber
+
+from .models import Comment, CustomUser, Like, Post, Share
+
+# Post columns each PostSerializer field reads (id and version are always loaded)
+POST_FIELD_COLUMNS = {
+    'user': ('user',),
+    'content': ('content',),
+    'like_count': ('like_count',),
+    'comment_count': ('comment_count',),
+    'share_count': ('share_count',),
+    'media_status': ('media_status',),
+    'created_at': ('created_at',),
+}
+
+# Most top-level comments previewed under each post (?comments_preview=)
+MAX_COMMENTS_PREVIEW = 10
+
+# CustomUser columns behind AuthorSerializer and UserSerializer respectively
+AUTHOR_COLUMNS = ('id', 'first_name', 'last_name', 'image', 'image_width', 'image_placeholder')
+PROFILE_COLUMNS = AUTHOR_COLUMNS + ('email', 'image_height', 'bio', 'date_of_birth', 'gender')
+
+
+def count_for_post(model):
+    """Correlated COUNT(*) of ``model`` rows for the outer post."""
+    counts = (
+        model.objects.filter(post=OuterRef('pk'))
+        .order_by()
+        .values('post')
+        .annotate(total=Count('*'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def feed_queryset(queryset=None, fields=None, expand=()):
+    """
+    Posts with everything PostSerializer reads loaded up front, and nothing else.
+
+    The author is joined and images / tagged users are prefetched; engagement counts
+    are stored columns on Post. ``fields`` / ``expand`` match the PostSerializer
+    arguments and narrow the SELECTs with only(). Serializing a page of posts
+    therefore costs a fixed number of queries however many posts it holds.
+    """
+    if queryset is None:
+        queryset = Post.objects.all()
+    if fields is None:
+        fields = POST_FIELD_COLUMNS.keys() | {'images', 'tagged_users'}
+
+    columns = ['id', 'version']
+    for name in fields:
+        columns.extend(POST_FIELD_COLUMNS.get(name, ()))
+
+    if 'user' in fields:
+        user_columns = PROFILE_COLUMNS if 'user' in expand else AUTHOR_COLUMNS
+        queryset = queryset.select_related('user')
+        columns.extend(f'user__{column}' for column in user_columns)
+    if 'images' in fields:
+        queryset = queryset.prefetch_related('images')
+    if 'tagged_users' in fields:
+        tagged_columns = PROFILE_COLUMNS if 'tagged_users' in expand else AUTHOR_COLUMNS
+        queryset = queryset.prefetch_related(
+            Prefetch('tagged_users', queryset=CustomUser.objects.only(*tagged_columns))
+        )
+    return queryset.only(*columns)
+
+
+def viewer_engagement(user_id, post_ids):
+    """
+    ``(liked, shared)``: which of ``post_ids`` the viewer has liked / shared.
+
+    One UNION query over the viewer's Like and Share rows for the page, each side an
+    index range scan on (user_id, post_id).
+    """
+    if not post_ids:
+        return set(), set()
+    rows = (
+        Like.objects.filter(user_id=user_id, post_id__in=post_ids)
+        .annotate(kind=Value('like', output_field=CharField()))
+        .values_list('post_id', 'kind')
+        .union(
+            Share.objects.filter(user_id=user_id, post_id__in=post_ids)
+            .annotate(kind=Value('share', output_field=CharField()))
+            .values_list('post_id', 'kind')
+        )
+    )
+    liked, shared = set(), set()
+    for post_id, kind in rows:
+        (liked if kind == 'like' else shared).add(post_id)
+    return liked, shared
+
+
+def comment_queryset():
+    """Comments with their author joined, loading only what CommentSerializer reads."""
+    return Comment.objects.select_related('user').only(
+        'id', 'post_id', 'parent_id', 'root_id', 'path', 'depth', 'reply_count', 'content', 'created_at',
+        *(f'user__{column}' for column in AUTHOR_COLUMNS)
+    )
+
+
+def comment_subtree(comment):
+    """
+    ``comment`` and every reply below it. Descendants are exactly the paths that start
+    with its own, so this is one range scan on the (root, path) index.
+    """
+    return comment_queryset().filter(
+        root_id=comment.root_id, path__gte=comment.path, path__lt=comment.path + '~'  # '~' sorts after digits and '/'
+    )
+
+
+def first_replies(root_ids, count):
+    """
+    ``{root_id: [reply, ...]}`` with the first ``count`` replies (at any depth, in thread
+    order) of each top-level comment, from one windowed query over (root, path).
+    """
+    if not root_ids or count < 1:
+        return {}
+    replies = (
+        comment_queryset()
+        .filter(root_id__in=root_ids, depth__gt=0)
+        .annotate(position=Window(RowNumber(), partition_by=[F('root_id')], order_by=[F('path').asc()]))
+        .filter(position__lte=count)
+        .order_by('root_id', 'position')
+    )
+    by_root = defaultdict(list)
+    for reply in replies:
+        by_root[reply.root_id].append(reply)
+    return by_root
+
+
+def _newest_first_position():
+    """Each top-level comment's 1-based position among its post's, newest first."""
+    return Window(RowNumber(), partition_by=[F('post_id')], order_by=[F('created_at').desc(), F('id').desc()])
+
+
+def latest_comments(post_ids, count):
+    """
+    ``{post_id: [comment, ...]}`` with the newest ``count`` top-level comments of each post.
+
+    One query: ROW_NUMBER() over each post's comments, newest first, filtered to the
+    first ``count`` rows per post; the (post, created_at, id) index supplies the order.
+    """
+    if not post_ids or count < 1:
+        return {}
+    comments = (
+        comment_queryset()
+        .filter(post_id__in=post_ids, parent__isnull=True)
+        .annotate(position=_newest_first_position())
+        .filter(position__lte=count)
+        .order_by('post_id', 'position')
+    )
+    by_post = defaultdict(list)
+    for comment in comments:
+        by_post[comment.post_id].append(comment)
+    return by_post
+
+
+def previewed_commenter_post_ids(user_id):
+    """
+    Ids of the posts whose comment previews can show ``user_id``: those where one of the
+    user's top-level comments is still among the newest MAX_COMMENTS_PREVIEW.
+    """
+    commented = Comment.objects.filter(user_id=user_id, parent__isnull=True).values('post_id')
+    # The window must see every comment of those posts, so the user is matched afterwards
+    previewed = (
+        Comment.objects.filter(post_id__in=commented, parent__isnull=True)
+        .annotate(position=_newest_first_position())
+        .filter(position__lte=MAX_COMMENTS_PREVIEW)
+        .values_list('post_id', 'user_id')
+    )
+    return {post_id for post_id, commenter_id in previewed if commenter_id == user_id}
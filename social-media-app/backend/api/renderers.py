@@ -0,0 +1,88 @@
+import datetime
+import decimal
+import uuid
+
+from cloudinary import CloudinaryResource
+from django.http import StreamingHttpResponse
+from django.utils.functional import Promise
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up; fall back to DRF's stdlib json path
+    orjson = None
+
+# Dict keys that are not strings, e.g. the item indexes in a ListField's errors, become
+# strings as they do with the stdlib encoder instead of raising
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+
+def _default(obj):
+    """Types orjson does not encode by itself."""
+    if isinstance(obj, CloudinaryResource):
+        return obj.url
+    if isinstance(obj, (decimal.Decimal, uuid.UUID, Promise)):
+        return str(obj)
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, '__iter__'):
+        return list(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+_stdlib_renderer = JSONRenderer()
+
+
+def dumps(data):
+    """Encode ``data`` to JSON bytes with orjson when installed, else like DRF's JSONRenderer."""
+    if orjson is None:
+        return _stdlib_renderer.render(data)
+    return orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in JSONRenderer backed by orjson.
+
+    Datetimes, dates and UUIDs are encoded natively and Cloudinary resources become
+    their delivery URL. Indented output (e.g. ``Accept: application/json; indent=4``)
+    and installs without orjson go through the stdlib renderer unchanged.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+
+
+def iter_json_list(key, chunks, extra=None):
+    """
+    Yield ``{"<key>": [...], **extra}`` as JSON bytes, one encoded chunk at a time.
+
+    ``chunks`` is an iterable of lists of already-serialized items, so only one chunk is
+    ever held in memory, both as Python objects and as bytes.
+    """
+    yield b'{' + dumps(key) + b':['
+    first = True
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if not first:
+            yield b','
+        yield dumps(chunk)[1:-1]  # Drop the chunk's own brackets
+        first = False
+    yield b']'
+    for name, value in (extra or {}).items():
+        yield b',' + dumps(name) + b':' + dumps(value)
+    yield b'}'
+
+
+def streaming_json_response(key, chunks, extra=None, headers=None):
+    response = StreamingHttpResponse(iter_json_list(key, chunks, extra), content_type='application/json')
+    for name, value in (headers or {}).items():
+        response[name] = value
+    return response
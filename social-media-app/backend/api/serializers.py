@@ -1,30 +1,52 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from rest_framework.authtoken.models import Token
 from .models import Post, Comment, PostImage, Share, Like
-import cloudinary.uploader
+from .media.pipeline import attach_post_images, store_images
+from .media.variants import AVATAR_WIDTHS, POST_IMAGE_WIDTHS, srcset
 
 User = get_user_model()
 
+
+# ✅ Resized-image URLs for an <img srcset>, built from the stored URL and width
+class SrcsetField(serializers.Field):
+    def __init__(self, widths, url_attr='image', width_attr='width', **kwargs):
+        kwargs.update(source='*', read_only=True)
+        super().__init__(**kwargs)
+        self.widths, self.url_attr, self.width_attr = widths, url_attr, width_attr
+
+    def to_representation(self, instance):
+        return srcset(getattr(instance, self.url_attr), self.widths, getattr(instance, self.width_attr))
+
+
 class UserSerializer(serializers.ModelSerializer):
+    image_srcset = SrcsetField(AVATAR_WIDTHS, width_attr='image_width')
+
     class Meta:
         model = User
-        fields = ('id', 'email', 'first_name', 'last_name', 'password', 'bio', 'image', 'date_of_birth', 'gender')
-        extra_kwargs = {'password': {'write_only': True}}
-
-    def create(self, validated_data):
-        user = User.objects.create_user(
-            email=validated_data['email'],
-            password=validated_data['password'],
-            first_name=validated_data.get('first_name', ''),
-            last_name=validated_data.get('last_name', ''),
-            bio=validated_data.get('bio', ''),
-            image=validated_data.get('image', ''),
-            date_of_birth=validated_data.get('date_of_birth', None),
-            gender=validated_data.get('gender', '')
+        fields = (
+            'id', 'email', 'first_name', 'last_name', 'password', 'bio', 'image', 'image_srcset',
+            'image_width', 'image_height', 'image_placeholder', 'date_of_birth', 'gender',
         )
-        Token.objects.create(user=user)
-        return user
+        read_only_fields = ('image_width', 'image_height', 'image_placeholder')
+        extra_kwargs = {
+            'password': {'write_only': True},
+            # Enforced by the unique column when the account is inserted (see api.accounts)
+            'email': {'validators': []},
+        }
+
+# ✅ Compact author shape used inside post listings
+class AuthorSerializer(serializers.ModelSerializer):
+    name = serializers.CharField(source='get_full_name', read_only=True)
+    image_srcset = SrcsetField(AVATAR_WIDTHS, width_attr='image_width')
+
+    class Meta:
+        model = User
+        fields = ('id', 'name', 'image', 'image_srcset', 'image_placeholder')
+
+
+class InvalidFieldset(ValueError):
+    pass
+
 
 class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
@@ -72,50 +94,94 @@ class ShareSerializer(serializers.ModelSerializer):
 
 # ✅ Comment Serializer
 class CommentSerializer(serializers.ModelSerializer):
-    user = UserSerializer(read_only=True)  # Serialize user details
+    """Pass ``context={'post_id': ...}`` when creating, so a reply's parent can be checked."""
+    user = AuthorSerializer(read_only=True)  # Compact author, as in post listings
+    parent = serializers.PrimaryKeyRelatedField(
+        queryset=Comment.objects.only('id', 'post_id', 'root_id', 'path', 'depth'), required=False, allow_null=True
+    )
 
     class Meta:
         model = Comment
-        fields = ('id', 'user', 'post', 'content', 'created_at')
-        read_only_fields = ('post',)
+        fields = ('id', 'user', 'post', 'parent', 'depth', 'reply_count', 'content', 'created_at')
+        read_only_fields = ('post', 'depth', 'reply_count')
+
+    def validate_parent(self, parent):
+        if parent is None:
+            return parent
+        if parent.post_id != self.context.get('post_id'):
+            raise serializers.ValidationError('Replies must be on the same post as their parent.')
+        if parent.depth + 1 > Comment.MAX_DEPTH:
+            raise serializers.ValidationError('This thread is nested too deeply to reply to.')
+        return parent
 
 
 # ✅ Post Image Serializer
 class PostImageSerializer(serializers.ModelSerializer):
+    srcset = SrcsetField(POST_IMAGE_WIDTHS)
+
     class Meta:
         model = PostImage
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'srcset', 'width', 'height', 'placeholder', 'status']
 
 
 # ✅ Post Serializer
 class PostSerializer(serializers.ModelSerializer):
-    user = UserSerializer(read_only=True)  # Serialize user object
+    """
+    Pass ``fields=`` to limit the output to those top-level fields and ``expand=`` to
+    render ``user`` / ``tagged_users`` with the full UserSerializer instead of the
+    compact AuthorSerializer.
+    """
+    user = AuthorSerializer(read_only=True)  # Serialize user object
     images = PostImageSerializer(many=True, read_only=True)
     uploaded_images = serializers.ListField(
         child=serializers.FileField(), write_only=True, required=False
     )
-    tagged_users = UserSerializer(many=True, read_only=True)  # Serialize tagged users
-    like_count = serializers.SerializerMethodField()
-    comment_count = serializers.SerializerMethodField()
-    share_count = serializers.SerializerMethodField()
+    tagged_users = AuthorSerializer(many=True, read_only=True)  # Serialize tagged users
+
+    EXPANDABLE = ('user', 'tagged_users')
+    # Per-viewer fields: selectable with ?fields= but filled in after the shared fragment
+    # cache, for the whole page at once (see views._page_overlay)
+    VIEWER_FIELDS = ('liked_by_me', 'shared_by_me')
 
     class Meta:
         model = Post
         fields = [
             'id', 'user', 'content', 'images', 'uploaded_images', 'tagged_users',
-            'like_count', 'comment_count', 'share_count', 'created_at'
+            'like_count', 'comment_count', 'share_count', 'media_status', 'created_at'
         ]
-        read_only_fields = ['images', 'created_at']
-
-    # ✅ Custom Methods to Get Counts
-    def get_like_count(self, obj):
-        return obj.likes.count()
-
-    def get_comment_count(self, obj):
-        return obj.post_comments.count()
-
-    def get_share_count(self, obj):
-        return obj.shares.count()
+        read_only_fields = ['images', 'like_count', 'comment_count', 'share_count', 'media_status', 'created_at']
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in expand:
+            self.fields[name] = UserSerializer(read_only=True, many=(name == 'tagged_users'))
+        if fields is not None:
+            for name in [name for name, field in self.fields.items() if not field.write_only]:
+                if name not in fields:
+                    self.fields.pop(name)
+
+    @classmethod
+    def readable_fields(cls):
+        return [name for name in cls.Meta.fields if name != 'uploaded_images'] + list(cls.VIEWER_FIELDS)
+
+    @classmethod
+    def parse_fieldset(cls, query_params):
+        """Read ``?fields=a,b&expand=c`` into (fields or None, sorted expand tuple)."""
+        fields = cls._split(query_params.get('fields'))
+        expand = cls._split(query_params.get('expand'))
+        unknown = [name for name in fields or () if name not in cls.readable_fields()]
+        unknown += [name for name in expand or () if name not in cls.EXPANDABLE]
+        if unknown:
+            raise InvalidFieldset(f"Unknown field(s): {', '.join(unknown)}")
+        if fields is not None:
+            fields = tuple(name for name in cls.readable_fields() if name in fields)
+        return fields, tuple(sorted(expand or ()))
+
+    @staticmethod
+    def _split(value):
+        if value is None:
+            return None
+        return {name.strip() for name in value.split(',') if name.strip()}
 
     # ✅ Create Post with Image Uploads and Tagged Users
     def create(self, validated_data):
@@ -127,9 +193,9 @@ class PostSerializer(serializers.ModelSerializer):
         tagged_users = User.objects.filter(id__in=tagged_users_data)
         post.tagged_users.set(tagged_users)
 
-        # ✅ Handle Image Uploads
-        for image in uploaded_images:
-            uploaded_image = cloudinary.uploader.upload(image)  # Upload to Cloudinary
-            PostImage.objects.create(post=post, image=uploaded_image["secure_url"])
+        # ✅ Handle Image Uploads (concurrently, in order, saved with one INSERT)
+        results, errors = store_images(uploaded_images, folder="post_images")
+        attach_post_images(post, results)
+        self.upload_errors = [{'index': index, 'error': str(e)} for index, e in errors]
 
         return post
@@ -0,0 +1,126 @@
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_token, invalidate_user_tokens, token_expiry_from_now
+from .media.gc import queue_deletion_for_url
+from .media.spool import discard_spooled_file
+from .models import Comment, CustomUser, Like, MediaUploadJob, Post, PostImage, Share, TokenExpiry
+from .queries import previewed_commenter_post_ids
+
+# Which Post counter column each engagement model feeds
+COUNTER_FIELDS = {
+    Like: 'like_count',
+    Share: 'share_count',
+    Comment: 'comment_count',
+}
+
+# CustomUser fields that appear inside a serialized post
+PROFILE_FIELDS = {
+    'email', 'first_name', 'last_name', 'bio', 'image', 'image_width', 'image_height',
+    'image_placeholder', 'date_of_birth', 'gender',
+}
+
+
+def _bump(post_id, field, delta):
+    """Adjust one counter in a single UPDATE so concurrent writers never lose increments."""
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(**{f'{field}__gt': 0})
+    posts.update(**{field: F(field) + delta, 'version': F('version') + 1})
+
+
+def bump_post_versions(posts):
+    """Invalidate the cached fragments of every post in ``posts`` (a queryset)."""
+    posts.update(version=F('version') + 1)
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=Share)
+@receiver(post_save, sender=Comment)
+def increment_post_counter(sender, instance, created, **kwargs):
+    if created:
+        _bump(instance.post_id, COUNTER_FIELDS[sender], 1)
+
+
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=Share)
+@receiver(post_delete, sender=Comment)
+def decrement_post_counter(sender, instance, **kwargs):
+    _bump(instance.post_id, COUNTER_FIELDS[sender], -1)
+
+
+@receiver(post_save, sender=Comment)
+def increment_thread_replies(sender, instance, created, **kwargs):
+    if created and instance.parent_id:
+        Comment.objects.filter(pk=instance.root_id).update(reply_count=F('reply_count') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_thread_replies(sender, instance, **kwargs):
+    if instance.parent_id:
+        Comment.objects.filter(pk=instance.root_id, reply_count__gt=0).update(reply_count=F('reply_count') - 1)
+
+
+@receiver(post_save, sender=PostImage)
+@receiver(post_delete, sender=PostImage)
+def post_images_changed(sender, instance, **kwargs):
+    bump_post_versions(Post.objects.filter(pk=instance.post_id))
+
+
+@receiver(m2m_changed, sender=Post.tagged_users.through)
+def post_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            bump_post_versions(Post.objects.filter(pk=instance.pk))
+    elif action in ('post_add', 'post_remove'):
+        bump_post_versions(Post.objects.filter(pk__in=pk_set))
+    elif action == 'pre_clear':
+        # Once cleared there is no way left to find the posts the user was tagged in
+        bump_post_versions(Post.objects.filter(pk__in=instance.tagged_posts.values('pk')))
+
+
+@receiver(post_save, sender=CustomUser)
+def user_profile_changed(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and not PROFILE_FIELDS & set(update_fields)):
+        return
+    # Posts embed their author and tagged users, and their comments_preview the commenters.
+    # Only posts where the user is still among the previewed comments are bumped, so the
+    # writes track what the previews can show rather than the user's whole comment history
+    bump_post_versions(Post.objects.filter(
+        Q(user=instance)
+        | Q(pk__in=instance.tagged_posts.values('pk'))
+        | Q(pk__in=previewed_commenter_post_ids(instance.pk))
+    ))
+
+
+@receiver(post_save, sender=CustomUser)
+def user_auth_changed(sender, instance, created, **kwargs):
+    # Deactivation, profile edits, ...: the next request re-reads the user (see api.authentication)
+    if not created:
+        transaction.on_commit(lambda: invalidate_user_tokens(instance.pk))
+
+
+@receiver(post_save, sender=Token)
+def token_created(sender, instance, created, **kwargs):
+    if created:
+        TokenExpiry.objects.create(token=instance, expires_at=token_expiry_from_now())
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_token(instance.key))
+
+
+@receiver(post_delete, sender=PostImage)
+def queue_post_image_deletion(sender, instance, **kwargs):
+    # Deleted later, in bulk, by `manage.py flush_media_deletions`
+    transaction.on_commit(lambda: queue_deletion_for_url(instance.image))
+
+
+@receiver(post_delete, sender=MediaUploadJob)
+def discard_job_spool_file(sender, instance, **kwargs):
+    # Jobs go with their post; a queued one's spooled upload would otherwise stay on disk
+    transaction.on_commit(lambda: discard_spooled_file(instance.source))
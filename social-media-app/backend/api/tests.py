@@ -1,19 +1,174 @@
-import cloudinary.uploader
+import tempfile
+from io import StringIO
+from unittest import mock
 
-import os
-from decouple import config
-cloudinary.config(
-    cloud_name= config('CLOUDINARY_CLOUD_NAME'),
-    api_key= config('CLOUDINARY_CLOUD_API'),
-    api_secret= config('CLOUDINARY_CLOUD_API_SECRET')
-)
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
 
-CLOUDINARY_STORAGE = {
-    'CLOUD_NAME': config('CLOUDINARY_CLOUD_NAME'),
-    'API_KEY': config('CLOUDINARY_CLOUD_API'),
-    'API_SECRET': config('CLOUDINARY_CLOUD_API_SECRET'),
-}
+from . import likebuffer
+from .authentication import _local as token_cache
+from .media.jobs import claim_next_job, enqueue_post_images, process_job, settle_post_media_status
+from .media.spool import spool_storage
+from .queries import MAX_COMMENTS_PREVIEW
+from .models import Comment, CustomUser, Like, MediaStatus, MediaUploadJob, Post, PostImage
 
 
-response = cloudinary.uploader.upload("c:\\Users\\manis\\Pictures\\Screenshots\\Screenshot 2025-02-25 000131.png")
-print(response)
+class APITestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = self.make_user('author@example.com')
+        self.client = self.client_for(self.user)
+
+    def make_user(self, email):
+        return CustomUser.objects.create_user(email=email, password='pw12345!', first_name='Test')
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.get_or_create(user=user)[0].key)
+        return client
+
+    def feed(self, **headers):
+        return self.client.get('/api/posts/', **headers)
+
+
+class RecountEngagementTests(APITestCase):
+    def test_recount_refreshes_cached_feed(self):
+        post = Post.objects.create(user=self.user, content='Hello')
+        Like.objects.create(user=self.user, post=post)
+        Post.objects.filter(pk=post.pk).update(like_count=8)
+
+        first = self.feed()
+        self.assertEqual(first.json()['posts'][0]['like_count'], 8)
+
+        call_command('recount_engagement', stdout=StringIO())
+
+        response = self.feed(HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['posts'][0]['like_count'], 1)
+
+
+class MediaStatusTests(APITestCase):
+    def settle(self, *image_statuses):
+        post = Post.objects.create(user=self.user, content='Photos', media_status=MediaStatus.PENDING)
+        for image_status in image_statuses:
+            PostImage.objects.create(post=post, status=image_status)
+        settle_post_media_status(post.pk)
+        return self.client.get(f'/api/posts/{post.pk}/media-status/').json()['media_status']
+
+    def test_all_uploaded_is_ready(self):
+        self.assertEqual(self.settle(MediaStatus.READY, MediaStatus.READY), MediaStatus.READY)
+
+    def test_all_failed_is_failed(self):
+        self.assertEqual(self.settle(MediaStatus.FAILED, MediaStatus.FAILED), MediaStatus.FAILED)
+
+    def test_some_failed_is_partial(self):
+        self.assertEqual(self.settle(MediaStatus.READY, MediaStatus.FAILED), MediaStatus.PARTIAL)
+
+    def test_pending_images_keep_post_pending(self):
+        self.assertEqual(self.settle(MediaStatus.READY, MediaStatus.PENDING), MediaStatus.PENDING)
+
+
+@override_settings(LIKES_WRITE_BEHIND=True)
+class BufferedLikeETagTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        # Never flushes on its own during a test
+        likebuffer._buffer = likebuffer.LikeBuffer(interval=3600)
+        self.addCleanup(setattr, likebuffer, '_buffer', None)
+
+    def test_viewer_like_changes_etag_when_counts_cancel_out(self):
+        other = self.make_user('other@example.com')
+        post = Post.objects.create(user=other, content='Hello')
+        Like.objects.create(user=other, post=post)
+
+        first = self.feed()
+        self.assertFalse(first.json()['posts'][0]['liked_by_me'])
+
+        # A like and an unlike wait in the buffer together: like_count nets out unchanged
+        self.client.put(f'/api/posts/{post.pk}/like/')
+        self.client_for(other).delete(f'/api/posts/{post.pk}/like/')
+        self.assertEqual(likebuffer.pending_like_deltas([post.pk]), {})
+
+        response = self.feed(HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['posts'][0]
+        self.assertTrue(data['liked_by_me'])
+        self.assertEqual(data['like_count'], 1)
+
+
+class MediaJobTests(APITestCase):
+    UPLOAD_RESULT = {
+        'secure_url': 'https://example.com/a.webp', 'public_id': 'a', 'width': 10, 'height': 10, 'placeholder': '',
+    }
+
+    def setUp(self):
+        super().setUp()
+        spool = tempfile.TemporaryDirectory()
+        self.addCleanup(spool.cleanup)
+        spool_settings = self.settings(MEDIA_SPOOL_ROOT=spool.name)
+        spool_settings.enable()
+        self.addCleanup(spool_settings.disable)
+        self.post = Post.objects.create(user=self.user, content='Photos')
+        self.source = enqueue_post_images(self.post, [ContentFile(b'image', name='a.png')])[0].upload_job.source
+
+    def test_failed_finish_requeues_job_and_keeps_spooled_file(self):
+        job = claim_next_job()
+        with mock.patch('api.media.jobs.store_image', return_value=self.UPLOAD_RESULT), \
+                mock.patch('api.media.jobs.settle_post_media_status', side_effect=DatabaseError('locked')):
+            self.assertFalse(process_job(job))
+
+        job.refresh_from_db()
+        self.assertEqual(job.state, MediaUploadJob.State.QUEUED)
+        self.assertEqual(job.last_error, 'locked')
+        self.assertTrue(spool_storage().exists(self.source))
+
+        with mock.patch('api.media.jobs.store_image', return_value=self.UPLOAD_RESULT):
+            self.assertTrue(process_job(claim_next_job()))
+        self.assertEqual(Post.objects.get(pk=self.post.pk).media_status, MediaStatus.READY)
+        self.assertFalse(spool_storage().exists(self.source))
+
+    def test_deleting_post_discards_queued_spooled_files(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.delete()
+        self.assertFalse(MediaUploadJob.objects.exists())
+        self.assertFalse(spool_storage().exists(self.source))
+
+
+class CommenterProfileTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.commenter = self.make_user('commenter@example.com')
+        self.previewed = Post.objects.create(user=self.user, content='Previewed')
+        self.buried = Post.objects.create(user=self.user, content='Buried')
+        for post in (self.previewed, self.buried):
+            Comment.objects.create(user=self.commenter, post=post, content='First!')
+        for _ in range(MAX_COMMENTS_PREVIEW):
+            Comment.objects.create(user=self.user, post=self.buried, content='Newer')
+
+    def versions(self):
+        return dict(Post.objects.values_list('pk', 'version'))
+
+    def test_profile_edit_refreshes_previews_showing_the_commenter(self):
+        first = self.client.get('/api/posts/?comments_preview=2')
+        self.commenter.first_name = 'Renamed'
+        self.commenter.save(update_fields=['first_name'])
+
+        response = self.client.get('/api/posts/?comments_preview=2', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        previewed = next(post for post in response.json()['posts'] if post['id'] == self.previewed.pk)
+        self.assertEqual(previewed['comments_preview'][0]['user']['name'], 'Renamed')
+
+    def test_profile_edit_skips_posts_whose_previews_no_longer_show_the_commenter(self):
+        before = self.versions()
+        self.commenter.first_name = 'Renamed'
+        self.commenter.save(update_fields=['first_name'])
+
+        after = self.versions()
+        self.assertEqual(after[self.previewed.pk], before[self.previewed.pk] + 1)
+        self.assertEqual(after[self.buried.pk], before[self.buried.pk])
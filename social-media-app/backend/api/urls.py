@@ -1,12 +1,17 @@
 from django.urls import path
-from .views import signup_view, login_view, post_view, update_user_view, get_user_posts_view, add_user_like
+from .views import signup_view, login_view, post_view, update_user_view, get_user_posts_view, add_user_like, post_media_status_view, post_like_view, post_comments_view, comment_thread_view
 
 urlpatterns = [
     path('signup/', signup_view, name='signup'),
     path('login/', login_view, name='login'),
     path('posts/', post_view, name='posts'),
+    path('posts/<int:post_id>/media-status/', post_media_status_view, name='post_media_status'),
     path('update-user/', update_user_view, name='update-user'),
     path('user-posts/', get_user_posts_view, name='get_user_posts'),  # Ensure this line exists
+    path('user-posts/<int:user_id>/', get_user_posts_view, name='get_other_user_posts'),
+    path('posts/<int:post_id>/like/', post_like_view, name='post_like'),
+    path('posts/<int:post_id>/comments/', post_comments_view, name='post_comments'),
+    path('comments/<int:comment_id>/thread/', comment_thread_view, name='comment_thread'),
     path('add-user-like/<int:post_id>/', add_user_like, name='add_user_like'),
 
 ]
@@ -1,43 +1,87 @@
-from django.contrib.auth import authenticate
+import json
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework import status
 from rest_framework.response import Response
-from rest_framework.authtoken.models import Token
-from .serializers import UserSerializer, LoginSerializer, PostSerializer, UserUpdateSerializer
-from .models import Post, PostImage
-from cloudinary.uploader import upload, destroy
-from rest_framework.permissions import AllowAny
+from .serializers import UserSerializer, LoginSerializer, PostSerializer, PostImageSerializer, UserUpdateSerializer, InvalidFieldset, CommentSerializer
+from .models import Comment, Post
 from rest_framework.permissions import IsAuthenticated
 import re
-from .models import CustomUser, Like
+from .accounts import EmailTaken, HashingBusy, authenticate_account, create_account, issue_token
+from .pagination import InvalidCursor, paginate_keyset, paginate_path, parse_limit, MAX_PAGE_SIZE, MAX_STREAM_PAGE_SIZE
+from .queries import comment_queryset, comment_subtree, feed_queryset, first_replies, latest_comments, viewer_engagement, MAX_COMMENTS_PREVIEW
+from .cache import serialize_posts
+from .conditional import conditional_response, posts_etag
+from .likebuffer import buffered_like_states, pending_like_deltas, set_like, toggle_like
+from .renderers import streaming_json_response
+from .media.gc import queue_deletion_for_url
+from .media.jobs import enqueue_post_images
+from .media.pipeline import attach_post_images, image_metadata, store_image, store_images
+from .media.processing import InvalidImage
+from .media.uploads import UploadTooLarge
 
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def signup_view(request):
-    serializer = UserSerializer(data=request.data)
-    if CustomUser.objects.filter(email=request.data.get('email')).exists():
-        return Response({'message': 'A user with this email already exists.'}, status=status.HTTP_400_BAD_REQUEST)
-    if serializer.is_valid():
-        user = serializer.save()
-        token, created = Token.objects.get_or_create(user=user)
-        return Response({
-            'user': serializer.data,
-            'token': token.key
-        }, status=status.HTTP_201_CREATED)
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+STREAM_CHUNK_SIZE = 100
+MAX_REPLIES_PREVIEW = 10
 
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def login_view(request):
-    serializer = LoginSerializer(data=request.data)
-    if serializer.is_valid():
-        user = authenticate(username=serializer.validated_data['email'], password=serializer.validated_data['password'])
-        if user:
-            token, created = Token.objects.get_or_create(user=user)
-            user_data = UserSerializer(user).data  # ✅ Serialize user object properly
-            return Response({'user': user_data, 'token': token.key}, status=status.HTTP_200_OK)
-        return Response({'error': 'Invalid Credentials'}, status=status.HTTP_400_BAD_REQUEST)
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+def _json_body(request):
+    """The parsed JSON (or form) body of a plain Django request; None if it is malformed."""
+    if request.content_type != 'application/json':
+        return request.POST
+    try:
+        return json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+
+
+def _hashing_busy_response(e):
+    response = JsonResponse({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    response['Retry-After'] = '1'
+    return response
+
+
+# ✅ Async: password hashing runs on the bounded pool in api.accounts, and under ASGI the worker serves
+# other requests meanwhile (under WSGI the request thread still waits for the hash)
+@csrf_exempt
+@require_POST
+async def signup_view(request):
+    data = _json_body(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON.'}, status=status.HTTP_400_BAD_REQUEST)
+    serializer = UserSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        # ✅ User and token are inserted in one transaction; the unique email column is the existence check
+        user, token = await create_account(serializer.validated_data)
+    except EmailTaken as e:
+        return JsonResponse({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except HashingBusy as e:
+        return _hashing_busy_response(e)
+    return JsonResponse({'user': UserSerializer(user).data, 'token': token.key}, status=status.HTTP_201_CREATED)
+
+
+@csrf_exempt
+@require_POST
+async def login_view(request):
+    data = _json_body(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON.'}, status=status.HTTP_400_BAD_REQUEST)
+    serializer = LoginSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        user = await authenticate_account(serializer.validated_data['email'], serializer.validated_data['password'])
+    except HashingBusy as e:
+        return _hashing_busy_response(e)
+    if user is None:
+        return JsonResponse({'error': 'Invalid Credentials'}, status=status.HTTP_400_BAD_REQUEST)
+    token = await issue_token(user)  # ✅ Refreshes the token's expiry, or rotates an expired one
+    user_data = UserSerializer(user).data  # ✅ Serialize user object properly
+    return JsonResponse({'user': user_data, 'token': token.key}, status=status.HTTP_200_OK)
 
 
 # update user
@@ -45,74 +89,255 @@ def login_view(request):
 @permission_classes([IsAuthenticated])
 def update_user_view(request):
     user = request.user  # Get the authenticated user
+    old_image = user.image
 
-    # print user
-    print(user.image)
-    try:
-        extracted_part = user.image.split("upload/")[1].split("/", 1)[1].split(".")[0]
-        # print(extracted_part)
-        res = destroy(extracted_part)
-        print(res)
-    except:
-        print("No image to delete")
     # Handle image upload
-    image = request.FILES.get('image')
+    try:
+        image = request.FILES.get('image')
+    except UploadTooLarge as e:
+        return Response({'error': str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    image_fields = {}
     if image:  # Upload only if an image is provided
         try:
-            result = upload(image, folder="user_profile_image")
+            result = store_image(image, folder="user_profile_image")  # ✅ Normalized and deduplicated
             request.data['image'] = result['secure_url']  # Replace image with uploaded URL
+            # ✅ Keep the dimensions and placeholder for the avatar's srcset
+            image_fields = {f'image_{field}': value for field, value in image_metadata(result).items()}
+        except InvalidImage as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': f'Image upload failed: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
+    elif request.data.get('image', old_image) != old_image:
+        # A plain URL comes without upload metadata
+        image_fields = {'image_public_id': '', 'image_width': None, 'image_height': None, 'image_placeholder': ''}
 
     serializer = UserUpdateSerializer(user, data=request.data, partial=True)
 
     if not serializer.is_valid():
         print("Serializer Errors:", serializer.errors)  # Debugging - Print validation errors
+        if image:
+            queue_deletion_for_url(request.data['image'])  # ✅ Don't leave the new upload orphaned
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    serializer.save()
+    serializer.save(**image_fields)
+    if old_image and user.image != old_image:
+        # ✅ The old image is removed later, in bulk, by `manage.py flush_media_deletions`
+        queue_deletion_for_url(old_image)
     return Response({'message': 'User updated successfully', 'user': serializer.data}, status=status.HTTP_200_OK)
 
+def _posts_page_response(request, queryset, empty_message=None):
+    """
+    One keyset page of ``queryset`` as ``{"posts": [...], "next": cursor}``.
+
+    Handles ?cursor, ?limit, ?fields / ?expand, ?comments_preview and ?stream, and
+    answers 304 when the client's ETag still matches. With ``empty_message``, an empty
+    first page is a 404.
+    """
+    stream = request.query_params.get('stream') in ('1', 'true')  # ✅ Encode and send the page in chunks
+    cursor = request.query_params.get('cursor')
+    try:
+        fields, expand = PostSerializer.parse_fieldset(request.query_params)  # ✅ ?fields=...&expand=...
+        limit = parse_limit(
+            request.query_params.get('limit'), maximum=MAX_STREAM_PAGE_SIZE if stream else MAX_PAGE_SIZE
+        )
+        # ✅ Latest N comments under every post, from one windowed query per page
+        comments_preview = parse_limit(
+            request.query_params.get('comments_preview'), default=0, maximum=MAX_COMMENTS_PREVIEW, minimum=0
+        )
+        posts, next_cursor = paginate_keyset(
+            queryset.only('id', 'created_at', 'version'), cursor, limit
+        )  # ✅ Keyset pagination, newest first
+    except (InvalidCursor, InvalidFieldset) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if empty_message and not posts and not cursor:
+        return Response({"message": empty_message}, status=status.HTTP_404_NOT_FOUND)
+
+    # ✅ Likes still in the write-behind buffer (if enabled) are added on top of the stored counts
+    post_ids = [post.id for post in posts]
+    like_deltas = pending_like_deltas(post_ids)
+    # ✅ The viewer's own buffered likes decide liked_by_me, even when the counts net out to zero
+    liked_states = (
+        buffered_like_states(request.user.id, post_ids) if 'liked_by_me' in _viewer_fields(fields) else {}
+    )
+
+    # ✅ 304 before any serialization when the page is unchanged
+    etag = posts_etag(
+        request, posts, next_cursor,
+        *(f'delta:{item}' for item in sorted(like_deltas.items())),
+        *(f'liked:{item}' for item in sorted(liked_states.items())),
+    )
+
+    def build_body():
+        personalize = _page_overlay(request, posts, fields, like_deltas, liked_states, comments_preview)
+        if stream:
+            chunks = (
+                serialize_posts(posts[start:start + STREAM_CHUNK_SIZE], fields, expand, personalize)
+                for start in range(0, len(posts), STREAM_CHUNK_SIZE)
+            )
+            return streaming_json_response("posts", chunks, {"next": next_cursor})
+        # ✅ Cached fragments
+        return {"posts": serialize_posts(posts, fields, expand, personalize), "next": next_cursor}
+
+    return conditional_response(request, etag, build_body)
+
+
+def _viewer_fields(fields):
+    return [name for name in PostSerializer.VIEWER_FIELDS if fields is None or name in fields]
+
+
+def _page_overlay(request, posts, fields, like_deltas, liked_states, comments_preview=0):
+    """
+    Per-request additions to the shared post fragments: liked_by_me / shared_by_me and
+    the comment previews for the whole page (one query each), plus any buffered
+    like_count changes and viewer likes.
+    """
+    wanted = _viewer_fields(fields)
+    post_ids = [post.id for post in posts]
+    liked, shared = viewer_engagement(request.user.id, post_ids) if wanted else (set(), set())
+    previews = latest_comments(post_ids, comments_preview)
+
+    def personalize(post_id, data):
+        data = dict(data)  # Never modify the cached fragment
+        if post_id in like_deltas and 'like_count' in data:
+            data['like_count'] = max(data['like_count'] + like_deltas[post_id], 0)
+        if 'liked_by_me' in wanted:
+            data['liked_by_me'] = liked_states.get(post_id, post_id in liked)
+        if 'shared_by_me' in wanted:
+            data['shared_by_me'] = post_id in shared
+        if comments_preview:
+            data['comments_preview'] = CommentSerializer(previews.get(post_id, []), many=True).data
+        return data
+
+    return personalize
+
+
 # Post view
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def post_view(request):
     if request.method == 'GET':
-        posts = Post.objects.all().select_related('user').order_by('-created_at')  # ✅ Optimize DB query and sort by latest date created
-        serializer = PostSerializer(posts, many=True)
-        return Response({"posts": serializer.data})
+        return _posts_page_response(request, Post.objects.all())
 
     if request.method == 'POST':
-        content = request.data.get('content', '')
-        images = request.FILES.getlist('images', [])  # Get uploaded images
+        try:
+            fields, expand = PostSerializer.parse_fieldset(request.query_params)
+        except InvalidFieldset as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            content = request.data.get('content', '')
+            images = request.FILES.getlist('images', [])  # Get uploaded images
+        except UploadTooLarge as e:
+            return Response({'error': str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
 
         post = Post.objects.create(user=request.user, content=content)
 
-        # ✅ Upload images to Cloudinary and save their URLs
-        for image in images:
-            try:
-                result = upload(image, folder="post_images")
-                PostImage.objects.create(post=post, image=result['secure_url'])
-            except Exception as e:
-                print(f"❌ Image Upload Failed: {e}")
+        upload_errors = []
+        if getattr(settings, 'MEDIA_UPLOAD_ASYNC', True):
+            # ✅ Respond at once with pending image slots; `manage.py run_media_worker` uploads them
+            enqueue_post_images(post, images, folder="post_images")
+        elif images:
+            # ✅ Upload all images concurrently, keeping their order, then save them in one INSERT
+            results, errors = store_images(images, folder="post_images")
+            attach_post_images(post, results)
+            upload_errors = [{'index': index, 'name': images[index].name, 'error': str(e)} for index, e in errors]
 
-        serializer = PostSerializer(post)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        post = feed_queryset(fields=fields, expand=expand).get(pk=post.pk)
+        data = PostSerializer(post, fields=fields, expand=expand).data
+        for name in _viewer_fields(fields):
+            data[name] = False  # Nobody has liked or shared a brand-new post
+        if upload_errors:
+            data['upload_errors'] = upload_errors
+        return Response(data, status=status.HTTP_201_CREATED)
 
 
-# Set up logging
+# Poll endpoint for posts whose images are still uploading
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def get_user_posts_view(request):
-    user = request.user  # Get the authenticated user
-    posts = Post.objects.filter(user=user).select_related('user').order_by('-created_at')  # Get posts for the current user
-    
-    serializer = PostSerializer(posts, many=True)  # Serialize the posts
-    # Check if there are no posts and log the information
-    if not posts.exists():
-        return Response({"message": "No posts found for this user."}, status=status.HTTP_404_NOT_FOUND)
-    return Response({"posts": serializer.data}, status=status.HTTP_200_OK)
+def post_media_status_view(request, post_id):
+    post = Post.objects.filter(pk=post_id).only('id', 'media_status').first()
+    if post is None:
+        return Response({'error': 'Post not found.'}, status=status.HTTP_404_NOT_FOUND)
+    images = PostImageSerializer(post.images.all(), many=True).data
+    return Response({'id': post.id, 'media_status': post.media_status, 'images': images}, status=status.HTTP_200_OK)
+
 
+# Profile timeline: the current user's posts, or another user's by id
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_user_posts_view(request, user_id=None):
+    if user_id is None:
+        user_id = request.user.id  # Default to the authenticated user
+    # ✅ Served by the (user_id, created_at DESC, id DESC) index in one query; an unknown
+    # user simply has no posts, so no separate existence check is needed
+    return _posts_page_response(
+        request, Post.objects.filter(user_id=user_id), empty_message="No posts found for this user."
+    )
+
+
+# Top-level comments on a post, newest first; replies are posted with a "parent"
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def post_comments_view(request, post_id):
+    if request.method == 'GET':
+        try:
+            limit = parse_limit(request.query_params.get('limit'))
+            replies = parse_limit(request.query_params.get('replies'), default=0, maximum=MAX_REPLIES_PREVIEW, minimum=0)
+            # ✅ Keyset pagination over the (post_id, created_at, id) index
+            comments, next_cursor = paginate_keyset(
+                comment_queryset().filter(post_id=post_id, parent__isnull=True), request.query_params.get('cursor'), limit
+            )
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = CommentSerializer(comments, many=True).data
+        if replies:
+            # ✅ First N replies of every comment on the page, in thread order, from one windowed query
+            by_root = first_replies([comment.id for comment in comments], replies)
+            for comment, item in zip(comments, data):
+                item['replies'] = CommentSerializer(by_root.get(comment.id, []), many=True).data
+        return Response({'comments': data, 'next': next_cursor}, status=status.HTTP_200_OK)
+
+    if request.method == 'POST':
+        if not Post.objects.filter(pk=post_id).exists():
+            return Response({'error': 'Post not found.'}, status=status.HTTP_404_NOT_FOUND)
+        serializer = CommentSerializer(data=request.data, context={'post_id': post_id})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        comment = serializer.save(user=request.user, post_id=post_id)  # ✅ comment_count is bumped by api.signals
+        return Response(CommentSerializer(comment).data, status=status.HTTP_201_CREATED)
+
+
+# A comment and all replies below it, in thread order
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def comment_thread_view(request, comment_id):
+    comment = Comment.objects.only('id', 'root_id', 'path').filter(pk=comment_id).first()
+    if comment is None:
+        return Response({'error': 'Comment not found.'}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        limit = parse_limit(request.query_params.get('limit'))
+        # ✅ The whole subtree is one (root, path) range; pages continue from the last path
+        comments, next_cursor = paginate_path(comment_subtree(comment), request.query_params.get('cursor'), limit)
+    except InvalidCursor as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(
+        {'comments': CommentSerializer(comments, many=True).data, 'next': next_cursor}, status=status.HTTP_200_OK
+    )
+
+
+# Idempotent like state: PUT likes the post, DELETE unlikes it
+@api_view(['PUT', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def post_like_view(request, post_id):
+    try:
+        # ✅ One conflict-tolerant INSERT / DELETE, or a buffered intent in write-behind mode
+        changed, like_count = set_like(request.user.id, post_id, liked=request.method == 'PUT')
+    except Post.DoesNotExist:
+        return Response({'error': 'Post not found.'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(
+        {'liked': request.method == 'PUT', 'changed': changed, 'like_count': like_count}, status=status.HTTP_200_OK
+    )
 
 
 @api_view(['POST'])
@@ -120,19 +345,11 @@ def get_user_posts_view(request):
 def add_user_like(request, post_id):  # Ensure this matches the URL pattern
     user = request.user
 
-    # Get the post by ID
     try:
-        post = Post.objects.get(id=post_id)
+        # ✅ Unlike if already liked, otherwise like; each step is a single race-free statement
+        liked, like_count = toggle_like(user.id, post_id)
     except Post.DoesNotExist:
         return Response({'error': 'Post not found.'}, status=status.HTTP_404_NOT_FOUND)
-
-    # Check if the user has already liked the post
-    existing_like = Like.objects.filter(user=user, post=post).first()
-    if existing_like:
-        # If the user already liked the post, remove the like
-        existing_like.delete()
-        return Response({'message': 'Like removed successfully!', 'like_count': post.like_count()}, status=status.HTTP_200_OK)
-    else:
-        # Create a new like
-        Like.objects.create(user=user, post=post)
-        return Response({'message': 'Post liked successfully!', 'like_count': post.like_count()}, status=status.HTTP_201_CREATED)
\ No newline at end of file
+    if not liked:
+        return Response({'message': 'Like removed successfully!', 'like_count': like_count}, status=status.HTTP_200_OK)
+    return Response({'message': 'Post liked successfully!', 'like_count': like_count}, status=status.HTTP_201_CREATED)
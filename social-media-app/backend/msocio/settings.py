@@ -15,6 +15,7 @@ import cloudinary
 import cloudinary.uploader
 import cloudinary.api
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -50,6 +51,54 @@ CLOUDINARY_STORAGE = {
     'API_SECRET': config('CLOUDINARY_CLOUD_API_SECRET'),
 }
 
+# Media uploads
+# Post images are spooled to MEDIA_SPOOL_ROOT and uploaded by `manage.py run_media_worker`.
+# Set MEDIA_UPLOAD_ASYNC = False to upload inside the request instead, and point
+# MEDIA_UPLOADER at 'api.media.backends.LocalFakeUploader' to work offline.
+MEDIA_UPLOADER = config('MEDIA_UPLOADER', default='api.media.client.CloudinaryClient')
+MEDIA_UPLOAD_ASYNC = config('MEDIA_UPLOAD_ASYNC', default=True, cast=bool)
+MEDIA_SPOOL_ROOT = BASE_DIR / 'media_spool'
+FAKE_MEDIA_ROOT = BASE_DIR / 'fake_media'
+FAKE_MEDIA_URL = '/fake-media/'
+FAKE_MEDIA_HOST = 'http://127.0.0.1:8000'
+# Images are resized, re-encoded and stripped of metadata before upload (needs Pillow)
+MEDIA_IMAGE_MAX_DIMENSION = 2048
+MEDIA_IMAGE_FORMAT = 'WEBP'
+MEDIA_IMAGE_QUALITY = 82
+# srcset widths emitted by the serializers, plus the size of the inline blurred placeholder
+MEDIA_IMAGE_WIDTHS = (320, 640, 960, 1280, 2048)
+MEDIA_AVATAR_WIDTHS = (48, 96, 192)
+MEDIA_PLACEHOLDER_SIZE = 16
+# Concurrent uploads per post on the inline path
+MEDIA_UPLOAD_CONCURRENCY = 4
+# Uploads above FILE_UPLOAD_MAX_MEMORY_SIZE are spooled to a temporary file instead of
+# memory, and oversized ones are rejected with 413 while they are still being received
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024
+FILE_UPLOAD_HANDLERS = [
+    'api.media.uploads.MaxSizeUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+MEDIA_UPLOAD_MAX_FILE_BYTES = 20 * 1024 * 1024
+MEDIA_UPLOAD_MAX_REQUEST_BYTES = 100 * 1024 * 1024
+
+# Pooled Cloudinary client (api.media.client). Set MEDIA_API_BASE_URL to the address
+# of `manage.py fake_cloudinary` to run against the local stand-in instead.
+MEDIA_API_BASE_URL = config('MEDIA_API_BASE_URL', default=None)
+MEDIA_API_POOL_SIZE = 10
+MEDIA_API_CONNECT_TIMEOUT = 5.0
+MEDIA_API_READ_TIMEOUT = 60.0
+MEDIA_API_MAX_RETRIES = 3
+MEDIA_API_BACKOFF_BASE = 0.2
+MEDIA_API_BACKOFF_CAP = 5.0
+# Files larger than this are sent as several Content-Range requests (Cloudinary minimum: 5 MB)
+MEDIA_API_CHUNK_SIZE = 6 * 1024 * 1024
+
+# Likes: with LIKES_WRITE_BEHIND, like/unlike taps are buffered per process and written
+# in batches every LIKES_FLUSH_INTERVAL_MS (see api.likebuffer)
+LIKES_WRITE_BEHIND = config('LIKES_WRITE_BEHIND', default=False, cast=bool)
+LIKES_FLUSH_INTERVAL_MS = 200
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -69,11 +118,15 @@ AUTH_USER_MODEL = 'api.CustomUser'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',  # TokenAuthentication without the per-request query
     ],
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',  # orjson when installed, stdlib json otherwise
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 MIDDLEWARE = [
@@ -110,14 +163,116 @@ WSGI_APPLICATION = 'msocio.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+# DB_PROFILE picks one of DATABASE_PROFILES; `manage.py bench_db` compares them. The
+# default leaves the checked-in dev database in rollback-journal mode; sqlite-wal switches
+# the file itself to WAL (and adds db.sqlite3-wal / -shm next to it), so deployments opt in.
+
+DB_PROFILE = config('DB_PROFILE', default='sqlite')
+DB_NAME = config('DB_NAME', default=None)
+
+# Applied to every new SQLite connection by the sqlite-wal profile. WAL lets reads run
+# alongside the single writer, synchronous=NORMAL only fsyncs at checkpoints (safe in
+# WAL mode), and busy_timeout makes writers wait for the lock instead of failing with
+# "database is locked"
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': config('SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int),
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int),
+    'cache_size': config('SQLITE_CACHE_SIZE', default=-64 * 1024, cast=int),  # Negative: KiB rather than pages
+}
+
+POSTGRES_CONNECTION = {
+    'ENGINE': 'django.db.backends.postgresql',
+    'NAME': DB_NAME or config('POSTGRES_DB', default='msocio'),
+    'USER': config('POSTGRES_USER', default='msocio'),
+    'PASSWORD': config('POSTGRES_PASSWORD', default=''),
+    'HOST': config('POSTGRES_HOST', default='localhost'),
+    'PORT': config('POSTGRES_PORT', default='5432'),
+}
+
+DATABASE_PROFILES = {
+    # SQLite with the library defaults and a new connection per request
+    'sqlite': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': DB_NAME or BASE_DIR / 'db.sqlite3',
+    },
+    'sqlite-wal': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': DB_NAME or BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            # Take the write lock at BEGIN, so busy_timeout also covers transactions that
+            # read before they write (a lock upgrade fails at once instead of waiting)
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=600, cast=int),
+        'CONN_HEALTH_CHECKS': True,
+    },
+    # PostgreSQL with persistent connections, checked before each request reuses them
+    'postgres': {
+        **POSTGRES_CONNECTION,
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=600, cast=int),
+        'CONN_HEALTH_CHECKS': True,
+    },
+    # PostgreSQL through a psycopg connection pool per process (pip install "psycopg[pool]");
+    # the pool takes the place of CONN_MAX_AGE and checks connections as it hands them out
+    'postgres-pool': {
+        **POSTGRES_CONNECTION,
+        'OPTIONS': {
+            'pool': {
+                'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+                'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+                'timeout': 10,
+            },
+        },
+    },
+}
+
+if DB_PROFILE not in DATABASE_PROFILES:
+    raise ImproperlyConfigured(f"DB_PROFILE must be one of {', '.join(DATABASE_PROFILES)}, not {DB_PROFILE!r}.")
+if DB_PROFILE == 'postgres-pool':
+    from psycopg_pool import ConnectionPool
+
+    DATABASE_PROFILES[DB_PROFILE]['OPTIONS']['pool']['check'] = ConnectionPool.check_connection
 
 DATABASES = {
+    'default': DATABASE_PROFILES[DB_PROFILE],
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Holds the serialized post fragments (api.cache). Point this at Redis/Memcached to
+# share fragments between worker processes.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+POST_CACHE_TIMEOUT = 60 * 60 * 24
+
+# api.authentication keeps recently used tokens in each process for AUTH_TOKEN_CACHE_TTL
+# seconds (also the longest a deactivation can take to reach other processes). Name a
+# cache alias in AUTH_TOKEN_SHARED_CACHE to share entries between processes as well.
+AUTH_TOKEN_CACHE_SIZE = 10000
+AUTH_TOKEN_CACHE_TTL = 60
+AUTH_TOKEN_SHARED_CACHE = config('AUTH_TOKEN_SHARED_CACHE', default=None)
+AUTH_TOKEN_SHARED_CACHE_TTL = 300
+# Tokens stop working this many seconds after their last use (api.models.TokenExpiry); the
+# stored expiry is pushed forward at most once per AUTH_TOKEN_REFRESH_INTERVAL seconds
+AUTH_TOKEN_LIFETIME = 60 * 60 * 24 * 30
+AUTH_TOKEN_REFRESH_INTERVAL = 60 * 60
+
+# Login and signup hash passwords on a pool of this many threads per process (api.accounts),
+# which caps the CPU they can take from other requests; beyond AUTH_HASHING_QUEUE waiting
+# hashes, they answer 503 with Retry-After. Under ASGI the request worker is also free
+# while a hash runs; under WSGI it waits for it
+AUTH_HASHING_WORKERS = config('AUTH_HASHING_WORKERS', default=2, cast=int)
+AUTH_HASHING_QUEUE = config('AUTH_HASHING_QUEUE', default=64, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -3,6 +3,7 @@ import React, { useState } from "react";
 import { IoMdCloseCircle } from "react-icons/io";
 import { FaLocationDot, FaUserTag } from "react-icons/fa6";
 import axios from "axios";
+import { pollPostMedia } from "../../context/userContext";
 
 const CreatePost = ({ setShowCreatePost }) => {
   const { user, setPosts } = useAuth();
@@ -53,7 +54,11 @@ const CreatePost = ({ setShowCreatePost }) => {
         }
       );
       if (response.status === 201) {
-        
+        const post = response.data;
+        setPosts((prevPosts) => [post, ...prevPosts]); // ✅ Show the new post right away
+        if (post.media_status === "pending") {
+          pollPostMedia({ postId: post.id, setPosts }); // ✅ Images are uploaded in the background
+        }
         setShowCreatePost(false);
       }
     } catch (error) {
@@ -1,10 +1,12 @@
 import React from "react";
 import PostCard from "./Posts/PostCard";
+import LoadMorePosts from "./Posts/LoadMorePosts";
 
 const Posts = () => {
   return (
     <div className="flex flex-col">
       <PostCard />
+      <LoadMorePosts />
     </div>
   );
 };
@@ -0,0 +1,19 @@
+import React from "react";
+import { useAuth } from "@/context/AuthContext";
+
+// ✅ Fetches the next page of whichever posts are shown (feed or profile)
+const LoadMorePosts = () => {
+  const { hasMorePosts, loadMorePosts, loadingPosts } = useAuth();
+  if (!hasMorePosts) return null;
+  return (
+    <button
+      className="self-center my-4 px-4 py-2 bg-white shadow-md rounded-lg text-gray-700 hover:bg-gray-100 disabled:opacity-50"
+      onClick={loadMorePosts}
+      disabled={loadingPosts}
+    >
+      {loadingPosts ? "Loading..." : "Load more"}
+    </button>
+  );
+};
+
+export default LoadMorePosts;
@@ -5,11 +5,10 @@ import { FaCircleUser } from "react-icons/fa6";
 import ShowSingleImage from "./ShowSingleImage";
 import {handleUserLike} from "../../../context/userContext";
 import { useParams } from "react-router-dom";
-import { getUserPosts } from "../../../context/userContext";
 
 const PostCard = () => {
   const { id } = useParams();
-  const { posts, setPosts, user } = useAuth();
+  const { posts, setPosts, showUserPosts, user } = useAuth();
   const [selectedImage, setSelectedImage] = useState(null);
   const handleImageClick = (imageUrl) => {
     setSelectedImage(imageUrl);
@@ -21,19 +20,9 @@ const PostCard = () => {
 
 
   useEffect(() => {
-    const fetchUserPosts = async () => {
-      if (id) {
-        try {
-          const userPosts = await getUserPosts();
-          setPosts(userPosts);
-        } catch (error) {
-          console.error("Error fetching user posts:", error);
-        }
-      }
-    };
-  
-    fetchUserPosts(); // ✅ Call the async function
-  
+    if (id) {
+      showUserPosts(id); // ✅ First page of the profile's posts; "Load more" fetches the rest
+    }
   }, [id]); // ✅ Include dependencies if necessary
 
   return (
@@ -49,15 +38,16 @@ const PostCard = () => {
               <div className="w-18 h-18 flex items-center justify-center rounded-full overflow-hidden">
               <img
                 src={post.user.image}
+                srcSet={post.user.image_srcset || undefined}
+                sizes="72px"
                 alt=""
                 className="shadow rounded-full"
+                style={post.user.image_placeholder ? { backgroundImage: `url(${post.user.image_placeholder})`, backgroundSize: "cover" } : undefined}
               />
               </div>
               <div>
                 <h2 className="text-lg font-semibold text-gray-800">
-                  {post.user?.first_name
-                    ? `${post.user.first_name} ${post.user.last_name}`
-                    : post.user?.email || "Unknown User"}
+                  {post.user?.name || "Unknown User"}
                 </h2>
                 <p className="text-sm text-gray-600">
                   {/* show only date */}
@@ -83,6 +73,18 @@ const PostCard = () => {
                 }`}
               >
                 {post.images.map((imageObj, idx) => {
+                  if (imageObj.status && imageObj.status !== "ready") {
+                    return (
+                      <div
+                        key={idx}
+                        className={`w-full ${
+                          post.images.length <= 2 ? "h-64" : "h-48"
+                        } flex items-center justify-center rounded-md bg-gray-100 text-gray-500`}
+                      >
+                        {imageObj.status === "pending" ? "Uploading..." : "Upload failed"}
+                      </div>
+                    );
+                  }
                   // ✅ Remove "image/upload/" prefix if it exists
                   const cleanImageUrl = imageObj.image.replace(
                     "image/upload/",
@@ -93,6 +95,14 @@ const PostCard = () => {
                     <img
                       key={idx}
                       src={cleanImageUrl}
+                      // ✅ Let the browser pick a resized variant and keep the layout stable
+                      srcSet={imageObj.srcset || undefined}
+                      sizes={post.images.length <= 2 ? "(max-width: 640px) 100vw, 640px" : "(max-width: 640px) 50vw, 320px"}
+                      width={imageObj.width || undefined}
+                      height={imageObj.height || undefined}
+                      loading="lazy"
+                      decoding="async"
+                      style={imageObj.placeholder ? { backgroundImage: `url(${imageObj.placeholder})`, backgroundSize: "cover" } : undefined}
                       alt={`Post image ${idx}`}
                       className={`w-full ${
                         post.images.length <= 2 ? "h-64" : "h-48"
@@ -107,7 +117,7 @@ const PostCard = () => {
             {/* Post Footer */}
             <div className="mt-4 flex justify-between items-center text-gray-600">
               <div className="flex items-center space-x-2">
-                <FaHeart className="text-red-500 cursor-pointer hover:scale-110 transition-transform" onClick={() => handleUserLike({ postId: post.id, setPosts })} />
+                <FaHeart className={`${post.liked_by_me ? "text-red-500" : "text-gray-400"} cursor-pointer hover:scale-110 transition-transform`} onClick={() => handleUserLike({ postId: post.id, liked: post.liked_by_me, setPosts })} />
                 <span>{post.like_count ?? 0} Likes</span>
               </div>
             </div>
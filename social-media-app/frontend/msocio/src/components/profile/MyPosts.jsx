@@ -1,6 +1,7 @@
 import { useAuth } from "@/context/AuthContext";
 import React, { useEffect } from "react";
 import PostCard from "../feeds/Posts/PostCard";
+import LoadMorePosts from "../feeds/Posts/LoadMorePosts";
 
 const MyPosts = () => {
     const {posts} = useAuth();
@@ -8,8 +9,9 @@ const MyPosts = () => {
 
     }, [posts]);
   return (
-    <div>
+    <div className="flex flex-col">
       <PostCard />
+      <LoadMorePosts />
     </div>
   );
 };
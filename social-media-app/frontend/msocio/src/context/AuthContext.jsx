@@ -1,5 +1,6 @@
 import axios from "axios";
 import React, { createContext, useState, useContext, useEffect } from "react";
+import { getUserPosts } from "./userContext";
 
 export const AuthContext = createContext();
 
@@ -11,28 +12,76 @@ export const AuthProvider = ({ children }) => {
   const [message, setMessage] = useState("");
   const [posts, setPosts] = useState([]);
 
-  const getPosts = async () => {
+  const [nextCursor, setNextCursor] = useState(null); // ✅ Cursor for the next feed page
+  // ✅ Whose posts are listed: null for the feed, { id } for a profile (see showUserPosts)
+  const [postsOwner, setPostsOwner] = useState(null);
+  const [loadingPosts, setLoadingPosts] = useState(false);
+
+  // ✅ Fetch one page of the feed; pass a cursor to continue after the last page
+  const fetchPostsPage = async (cursor = null) => {
     const token = localStorage.getItem("token");
     if (!token) {
       console.error("No token found, user is not authenticated!");
-      return;
+      return null;
     }
 
+    setLoadingPosts(true);
     try {
       const response = await axios.get("http://127.0.0.1:8000/api/posts/", {
         headers: {
           Authorization: `Token ${token}`, // ✅ Use 'Token' instead of 'Bearer'
         },
+        params: cursor ? { cursor } : {},
       });
-      // console.log(response.data.posts)
-      setPosts(response.data.posts);
+      setNextCursor(response.data.next);
+      return response.data.posts;
     } catch (error) {
       console.error(
         "Error fetching posts:",
         error.response?.data || error.message
       );
+      return null;
+    } finally {
+      setLoadingPosts(false);
     }
   };
+
+  // ✅ Fetch one page of a user's posts (the logged-in user when userId is null)
+  const fetchUserPostsPage = async (userId, cursor = null) => {
+    setLoadingPosts(true);
+    try {
+      const page = await getUserPosts(userId, cursor);
+      if (!page) return null;
+      setNextCursor(page.next);
+      return page.posts;
+    } finally {
+      setLoadingPosts(false);
+    }
+  };
+
+  // ✅ Load the first page, replacing whatever is in the feed
+  const getPosts = async () => {
+    setPostsOwner(null);
+    const page = await fetchPostsPage();
+    if (page) setPosts(page);
+  };
+
+  // ✅ Load the first page of a user's posts, e.g. on their profile
+  const showUserPosts = async (userId = null) => {
+    setPostsOwner({ id: userId });
+    const page = await fetchUserPostsPage(userId);
+    if (page) setPosts(page);
+  };
+
+  // ✅ Append the next page of whichever list is shown
+  const loadMorePosts = async () => {
+    if (!nextCursor || loadingPosts) return;
+    const page = postsOwner
+      ? await fetchUserPostsPage(postsOwner.id, nextCursor)
+      : await fetchPostsPage(nextCursor);
+    if (page) setPosts((prevPosts) => [...prevPosts, ...page]);
+  };
+
   // ✅ Function to save user in localStorage
   const saveUser = (userData) => {
     setUser(userData.user);
@@ -118,6 +167,10 @@ export const AuthProvider = ({ children }) => {
         message,
         posts,
         getPosts,
+        showUserPosts,
+        loadMorePosts,
+        hasMorePosts: nextCursor !== null,
+        loadingPosts,
         setPosts
       }}
     >
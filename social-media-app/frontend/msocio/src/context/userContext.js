@@ -1,9 +1,10 @@
 import axios from "axios";
 
-export const handleUserLike = async ({ postId, setPosts }) => {
+export const handleUserLike = async ({ postId, liked, setPosts }) => {
     try {
-        const response = await fetch(`http://localhost:8000/api/add-user-like/${postId}/`, {
-            method: 'POST',
+        // ✅ Idempotent: PUT likes, DELETE unlikes, so double taps can't flip the state back
+        const response = await fetch(`http://localhost:8000/api/posts/${postId}/like/`, {
+            method: liked ? 'DELETE' : 'PUT',
             headers: {
                 'Content-Type': 'application/json',
                 'Authorization': `Token ${localStorage.getItem('token')}`
@@ -20,7 +21,7 @@ export const handleUserLike = async ({ postId, setPosts }) => {
         // ✅ Update only the liked post
         setPosts((prevPosts) =>
             prevPosts.map((post) =>
-                post.id === postId ? { ...post, like_count: data.like_count } : post
+                post.id === postId ? { ...post, like_count: data.like_count, liked_by_me: data.liked } : post
             )
         );
 
@@ -31,7 +32,36 @@ export const handleUserLike = async ({ postId, setPosts }) => {
 };
 
 
-export const getUserPosts = async () => {
+// ✅ Poll a post whose images are still uploading and patch it into the feed when done
+export const pollPostMedia = async ({ postId, setPosts, interval = 1500, maxAttempts = 40 }) => {
+    for (let attempt = 0; attempt < maxAttempts; attempt++) {
+        await new Promise((resolve) => setTimeout(resolve, interval));
+        try {
+            const response = await axios.get(
+                `http://127.0.0.1:8000/api/posts/${postId}/media-status/`,
+                { headers: { Authorization: `Token ${localStorage.getItem("token")}` } }
+            );
+            const { media_status, images } = response.data;
+            if (media_status !== "pending") {
+                setPosts((prevPosts) =>
+                    prevPosts.map((post) =>
+                        post.id === postId ? { ...post, media_status, images } : post
+                    )
+                );
+                return response.data;
+            }
+        } catch (error) {
+            console.error("Error polling post media:", error.response?.data || error.message);
+            return null;
+        }
+    }
+    return null;
+};
+
+
+// ✅ One page of posts of the user with the given id (the logged-in user when omitted),
+// as { posts, next }; pass `next` back as the cursor to get the following page
+export const getUserPosts = async (userId = null, cursor = null) => {
     const token = localStorage.getItem("token");
     if (!token) {
       console.error("No token found, user is not authenticated!");
@@ -39,14 +69,17 @@ export const getUserPosts = async () => {
     }
     try {
       const response = await axios.get(
-        "http://127.0.0.1:8000/api/user-posts/",
+        userId
+          ? `http://127.0.0.1:8000/api/user-posts/${userId}/`
+          : "http://127.0.0.1:8000/api/user-posts/",
         {
           headers: {
             Authorization: `Token ${token}`, // Use 'Token' instead of 'Bearer'
           },
+          params: cursor ? { cursor } : {},
         }
       );
-      return response.data.posts; // Assuming setPosts is defined in your component
+      return { posts: response.data.posts, next: response.data.next };
     } catch (error) {
       console.error(
         "Error fetching user posts:",